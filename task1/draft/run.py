@@ -1,13 +1,23 @@
+import sys
+
 from PIL import Image
 from PIL.ExifTags import TAGS
 
-print("start")
 
-img = Image.open('sourse/image.png')
-exif = img.getexif()
+def main() -> None:
+    image_path = sys.argv[1] if len(sys.argv) > 1 else 'sourse/image.png'
+
+    print("start")
+
+    img = Image.open(image_path)
+    exif = img.getexif()
+
+    for tag_id, value in exif.items():
+        tag = TAGS.get(tag_id, tag_id)
+        print(f"{tag}: {value}")
+
+    print("end")
 
-for tag_id, value in exif.items():
-    tag = TAGS.get(tag_id, tag_id)
-    print(f"{tag}: {value}")
 
-print("end")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
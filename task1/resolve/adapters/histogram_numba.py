@@ -0,0 +1,33 @@
+"""
+Ядра вычисления гистограмм на Numba.
+Модуль необязателен: без установленного numba импорт завершится ImportError.
+"""
+import numpy as np
+import numba
+from numba import njit, prange
+
+
+@njit(parallel=True, cache=True, boundscheck=False)
+def hist_rgb_u8(img: np.ndarray, out: np.ndarray) -> None:
+    """Вычисляет гистограммы R, G, B изображения uint8 в массив out формы (3, 256)"""
+    height = img.shape[0]
+    width = img.shape[1]
+    n_blocks = numba.get_num_threads()
+    rows_per_block = (height + n_blocks - 1) // n_blocks
+
+    # Каждый блок строк накапливает свою приватную гистограмму
+    partial = np.zeros((n_blocks, 3, 256), dtype=np.int64)
+    for block in prange(n_blocks):
+        start = block * rows_per_block
+        stop = min(start + rows_per_block, height)
+        local = partial[block]
+        for y in range(start, stop):
+            for x in range(width):
+                local[0, img[y, x, 0]] += 1
+                local[1, img[y, x, 1]] += 1
+                local[2, img[y, x, 2]] += 1
+
+    # Сводим приватные гистограммы
+    out[:, :] = 0
+    for block in range(n_blocks):
+        out += partial[block]
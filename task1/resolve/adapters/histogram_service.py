@@ -2,42 +2,119 @@
 Сервис для работы с гистограммами.
 """
 import io
-from typing import Tuple
+import threading
+from typing import Dict, List, Optional, Tuple
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib
+import cv2
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from PIL import Image as PILImage
 
 from domain.models import Histogram
-from domain.interfaces import IHistogramService, IImageDisplayService
+from domain.interfaces import IHistogramService, IHistogramPreviewService, IImageDisplayService
 
-# Используем Agg backend для matplotlib (без GUI)
-matplotlib.use('Agg')
+try:
+    from adapters.histogram_numba import hist_rgb_u8
+except ImportError:
+    # numba не установлена - используем только numpy
+    hist_rgb_u8 = None
+
+# Смещения бинов каналов R, G, B для совмещенной гистограммы
+_CHANNEL_OFFSETS = np.array([0, 256, 512], dtype=np.uint16)
+
+# Значения оси X графика гистограммы (создаются один раз)
+_X256 = np.arange(256, dtype=np.uint16)
+
+# Минимальный размер изображения (в элементах), начиная с которого
+# используется параллельное ядро Numba
+_NUMBA_SIZE_THRESHOLD = 2_000_000
+
+# Буферы кодирования, по одному на поток (превью и гистограммы строятся в фоне)
+_thread_buffers = threading.local()
+
+
+def _rgb_histogram(image_data: np.ndarray) -> np.ndarray:
+    """Вычисляет гистограммы R, G, B одним вызовом bincount (768 бинов)"""
+    if hist_rgb_u8 is not None and image_data.size > _NUMBA_SIZE_THRESHOLD:
+        counts = np.empty((3, 256), dtype=np.int64)
+        hist_rgb_u8(image_data, counts)
+        return counts.ravel().astype(np.int32)
+
+    # Смещаем значения каналов: R -> [0, 256), G -> [256, 512), B -> [512, 768)
+    indices = np.add(image_data[:, :, :3], _CHANNEL_OFFSETS, dtype=np.uint16)
+    return np.bincount(indices.ravel(), minlength=768).astype(np.int32)
+
+
+def _reusable_buffer() -> io.BytesIO:
+    """Возвращает очищенный буфер кодирования текущего потока"""
+    buffer = getattr(_thread_buffers, 'buffer', None)
+    if buffer is None:
+        buffer = _thread_buffers.buffer = io.BytesIO()
+    buffer.seek(0)
+    buffer.truncate(0)
+    return buffer
+
+
+def _fit_to_size(image_data: np.ndarray, max_size: Tuple[int, int]) -> np.ndarray:
+    """Уменьшает изображение с сохранением пропорций, чтобы оно поместилось в max_size"""
+    height, width = image_data.shape[:2]
+    scale = min(max_size[0] / width, max_size[1] / height)
+    if scale >= 1.0:
+        return image_data
+    
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    # INTER_AREA усредняет пиксели при уменьшении и в разы быстрее LANCZOS в Pillow
+    return cv2.resize(np.ascontiguousarray(image_data), size, interpolation=cv2.INTER_AREA)
+
+
+def _channel_histogram(channel: np.ndarray) -> np.ndarray:
+    """Вычисляет гистограмму одного канала (256 бинов)"""
+    if channel.dtype == np.uint8:
+        # Для uint8 bincount значительно быстрее np.histogram
+        return np.bincount(np.ascontiguousarray(channel).ravel(), minlength=256).astype(np.int32)
+
+    hist, _ = np.histogram(channel.ravel(), bins=256, range=(0, 256))
+    return hist.astype(np.int32, copy=False)
 
 
 class MatplotlibHistogramService(IHistogramService):
-    """Сервис гистограмм на основе Matplotlib"""
+    """Сервис гистограмм на основе Matplotlib
+    
+    Каналы гистограммы возвращаются как int32: 256 бинов не переполнятся,
+    а matplotlib получает вдвое меньший массив, чем int64 по умолчанию.
+    """
+    
+    def __init__(self, fast_preview: bool = False):
+        # Фигуры создаются один раз и переиспользуются между вызовами
+        self._plots: Dict[Tuple[str, float, float], '_HistogramPlot'] = {}
+        self._plot_lock = threading.Lock()
+        # Быстрая отрисовка без matplotlib для интерактивного просмотра
+        self._fast_renderer = FastHistogramRenderer() if fast_preview else None
     
     def calculate_histogram(self, image_data: np.ndarray) -> Histogram:
         """Вычисляет гистограмму изображения"""
         try:
             if len(image_data.shape) == 2:
                 # Grayscale image
-                hist, _ = np.histogram(image_data.flatten(), bins=256, range=(0, 256))
-                return Histogram(grayscale=hist)
+                return Histogram(grayscale=_channel_histogram(image_data))
             
             elif len(image_data.shape) == 3:
                 # Color image
                 if image_data.shape[2] >= 3:
-                    # RGB channels
-                    hist_r, _ = np.histogram(image_data[:,:,0].flatten(), bins=256, range=(0, 256))
-                    hist_g, _ = np.histogram(image_data[:,:,1].flatten(), bins=256, range=(0, 256))
-                    hist_b, _ = np.histogram(image_data[:,:,2].flatten(), bins=256, range=(0, 256))
+                    if image_data.dtype == np.uint8:
+                        # Все три канала за один проход
+                        counts = _rgb_histogram(image_data)
+                        return Histogram(
+                            red_channel=counts[0:256],
+                            green_channel=counts[256:512],
+                            blue_channel=counts[512:768]
+                        )
                     
+                    # RGB channels
                     return Histogram(
-                        red_channel=hist_r,
-                        green_channel=hist_g,
-                        blue_channel=hist_b
+                        red_channel=_channel_histogram(image_data[:,:,0]),
+                        green_channel=_channel_histogram(image_data[:,:,1]),
+                        blue_channel=_channel_histogram(image_data[:,:,2])
                     )
             
             raise ValueError("Неподдерживаемый формат изображения для гистограммы")
@@ -48,37 +125,162 @@ class MatplotlibHistogramService(IHistogramService):
     
     def plot_histogram(self, histogram: Histogram, title: str = "", width: float = 10, height: float = 6) -> bytes:
         """Строит график гистограммы и возвращает его как байты"""
+        if self._fast_renderer is not None:
+            return self._fast_renderer.render(histogram, width, height)
+        
+        # Закэшированные фигуры изменяются на месте, поэтому отрисовка
+        # из разных потоков выполняется по очереди
+        with self._plot_lock:
+            try:
+                if histogram.grayscale is not None:
+                    kind = 'gray'
+                    channels = [histogram.grayscale]
+                    title = f'Гистограмма (Градации серого) {title}'
+                elif histogram.has_color_channels():
+                    kind = 'rgb'
+                    channels = [histogram.red_channel, histogram.green_channel, histogram.blue_channel]
+                    title = f'Гистограмма RGB {title}'
+                else:
+                    kind = 'empty'
+                    channels = []
+                
+                plot = self._get_plot(kind, width, height)
+                
+                # Обновляем данные линий и пересоздаем заливку
+                for fill in plot.fills:
+                    fill.remove()
+                plot.fills = []
+                for line, fill_color, data in zip(plot.lines, plot.fill_colors, channels):
+                    line.set_ydata(data)
+                    plot.fills.append(
+                        plot.axes.fill_between(_X256, data, alpha=0.3, color=fill_color)
+                    )
+                
+                if channels:
+                    plot.axes.set_title(title)
+                plot.axes.relim()
+                plot.axes.autoscale_view()
+                plot.figure.tight_layout()
+                
+                buffer = _reusable_buffer()
+                plot.canvas.print_png(buffer)
+                image_bytes = buffer.getvalue()
+                
+                return image_bytes
+                
+            except Exception as e:
+                print(f"Ошибка построения гистограммы: {e}")
+                raise
+    
+    def close(self) -> None:
+        """Освобождает закэшированные фигуры matplotlib"""
+        # Фигуры не регистрируются в pyplot, поэтому достаточно отпустить ссылки
+        self._plots.clear()
+    
+    def _get_plot(self, kind: str, width: float, height: float) -> '_HistogramPlot':
+        """Возвращает закэшированную фигуру для типа гистограммы и размера"""
+        key = (kind, width, height)
+        plot = self._plots.get(key)
+        if plot is not None:
+            return plot
+        
+        # Figure + FigureCanvasAgg без pyplot: нет глобального состояния и блокировок
+        figure = Figure(figsize=(width, height), dpi=100)
+        canvas = FigureCanvasAgg(figure)
+        axes = figure.add_subplot(111)
+        
+        if kind == 'gray':
+            series = [('black', 'gray', None)]
+        elif kind == 'rgb':
+            series = [
+                ('red', 'red', 'Красный'),
+                ('green', 'green', 'Зеленый'),
+                ('blue', 'blue', 'Синий'),
+            ]
+        else:
+            series = []
+        
+        lines = [
+            axes.plot(_X256, np.zeros(256), color=color, alpha=0.7, label=label)[0]
+            for color, _, label in series
+        ]
+        
+        if series:
+            axes.set_xlabel('Значение яркости')
+            axes.set_ylabel('Количество пикселей')
+        if kind == 'rgb':
+            axes.legend()
+        axes.grid(True, alpha=0.3)
+        
+        plot = _HistogramPlot(figure, canvas, axes, lines, [fill for _, fill, _ in series])
+        self._plots[key] = plot
+        return plot
+
+
+class _HistogramPlot:
+    """Переиспользуемая фигура гистограммы"""
+    
+    def __init__(self, figure: Figure, canvas: FigureCanvasAgg, axes, lines: list, fill_colors: List[str]):
+        self.figure = figure
+        self.canvas = canvas
+        self.axes = axes
+        self.lines = lines
+        self.fill_colors = fill_colors
+        self.fills: list = []
+
+
+class FastHistogramRenderer:
+    """Быстрая отрисовка гистограммы средствами numpy и Pillow (без matplotlib)"""
+    
+    def __init__(self, dpi: int = 100):
+        self._dpi = dpi
+    
+    def render(self, histogram: Histogram, width: float = 10, height: float = 6) -> bytes:
+        """Рисует столбчатую гистограмму и возвращает PNG как байты"""
         try:
-            plt.figure(figsize=(width, height))
-            
             if histogram.grayscale is not None:
-                plt.plot(range(256), histogram.grayscale, color='black', alpha=0.7)
-                plt.fill_between(range(256), histogram.grayscale, alpha=0.3, color='gray')
-                plt.title(f'Гистограмма (Градации серого) {title}')
-                plt.xlabel('Значение яркости')
-                plt.ylabel('Количество пикселей')
-                
+                series = [(histogram.grayscale, None)]
             elif histogram.has_color_channels():
-                plt.plot(range(256), histogram.red_channel, color='red', alpha=0.7, label='Красный')
-                plt.plot(range(256), histogram.green_channel, color='green', alpha=0.7, label='Зеленый')
-                plt.plot(range(256), histogram.blue_channel, color='blue', alpha=0.7, label='Синий')
-                plt.fill_between(range(256), histogram.red_channel, alpha=0.3, color='red')
-                plt.fill_between(range(256), histogram.green_channel, alpha=0.3, color='green')
-                plt.fill_between(range(256), histogram.blue_channel, alpha=0.3, color='blue')
-                plt.title(f'Гистограмма RGB {title}')
-                plt.xlabel('Значение яркости')
-                plt.ylabel('Количество пикселей')
-                plt.legend()
-            
-            plt.grid(True, alpha=0.3)
-            plt.tight_layout()
-            
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-            buffer.seek(0)
+                series = [
+                    (histogram.red_channel, 0),
+                    (histogram.green_channel, 1),
+                    (histogram.blue_channel, 2),
+                ]
+            else:
+                series = []
+            
+            return self.render_series(series, width, height)
+            
+        except Exception as e:
+            print(f"Ошибка построения гистограммы: {e}")
+            raise
+    
+    def render_series(self, series: List[Tuple[np.ndarray, Optional[int]]], width: float = 10, height: float = 6) -> bytes:
+        """Рисует каналы гистограммы (данные, индекс канала RGB или None для серого)"""
+        try:
+            canvas_width = max(256, int(width * self._dpi))
+            canvas_height = max(2, int(height * self._dpi))
+            canvas = np.zeros((canvas_height, canvas_width, 3), dtype=np.uint8)
+            
+            # Каналы складываются аддитивно: пересечение R, G, B дает белый
+            rows = np.arange(canvas_height)[:, None]
+            # Номер бина для каждого столбца холста
+            columns = (np.arange(canvas_width) * 256) // canvas_width
+            
+            for data, channel in series:
+                peak = data.max()
+                if peak == 0:
+                    continue
+                bar_heights = (data[columns] / peak * (canvas_height - 1)).astype(np.int32)
+                mask = rows >= (canvas_height - bar_heights)[None, :]
+                if channel is None:
+                    canvas[mask] = 200
+                else:
+                    canvas[mask, channel] = 255
+            
+            buffer = _reusable_buffer()
+            PILImage.fromarray(canvas).save(buffer, format='PNG', compress_level=1, optimize=False)
             image_bytes = buffer.getvalue()
-            buffer.close()
-            plt.close()
             
             return image_bytes
             
@@ -87,12 +289,54 @@ class MatplotlibHistogramService(IHistogramService):
             raise
 
 
+class FastPreviewService(IHistogramPreviewService):
+    """Быстрое превью гистограммы: пиксели -> PNG без промежуточной модели Histogram"""
+    
+    def __init__(self, renderer: Optional[FastHistogramRenderer] = None):
+        self._renderer = renderer or FastHistogramRenderer()
+    
+    def render_histogram_preview(self, image_data: np.ndarray, width: float = 10, height: float = 6) -> bytes:
+        """Вычисляет и рисует гистограмму изображения"""
+        try:
+            if image_data.ndim == 2:
+                series = [(_channel_histogram(image_data), None)]
+            elif image_data.ndim == 3 and image_data.shape[2] >= 3 and image_data.dtype == np.uint8:
+                counts = _rgb_histogram(image_data)
+                series = [(counts[0:256], 0), (counts[256:512], 1), (counts[512:768], 2)]
+            elif image_data.ndim == 3 and image_data.shape[2] >= 3:
+                series = [(_channel_histogram(image_data[:, :, c]), c) for c in range(3)]
+            else:
+                raise ValueError("Неподдерживаемый формат изображения для гистограммы")
+            
+            return self._renderer.render_series(series, width, height)
+            
+        except Exception as e:
+            print(f"Ошибка построения превью гистограммы: {e}")
+            raise
+
+
 class PillowDisplayService(IImageDisplayService):
     """Сервис отображения изображений на основе Pillow"""
     
+    def __init__(self, preview_format: str = 'PPM'):
+        """
+        Args:
+            preview_format: Формат превью ('PPM' или 'PNG'). PPM - это
+                несжатые пиксели, которые tkinter.PhotoImage читает напрямую,
+                без zlib. JPEG tkinter.PhotoImage не декодирует, поэтому он
+                не принимается.
+        """
+        if preview_format not in ('PPM', 'PNG'):
+            raise ValueError(f"Неподдерживаемый формат превью: {preview_format}")
+        self._preview_format = preview_format
+    
     def prepare_for_display(self, image_data: np.ndarray, max_size: Tuple[int, int] = (800, 600)) -> bytes:
         """Подготавливает изображение для отображения в GUI"""
         try:
+            # Уменьшаем до размера окна до создания PIL Image: в Pillow
+            # копируется и кодируется уже превью, а не полное изображение
+            image_data = _fit_to_size(image_data, max_size)
+            
             # Преобразуем в PIL Image
             if len(image_data.shape) == 2:
                 # Grayscale
@@ -109,17 +353,17 @@ class PillowDisplayService(IImageDisplayService):
             else:
                 raise ValueError("Неподдерживаемый формат изображения")
             
-            # Изменяем размер, сохраняя пропорции
-            original_size = pil_image.size
-            if original_size[0] > max_size[0] or original_size[1] > max_size[1]:
-                pil_image.thumbnail(max_size, PILImage.Resampling.LANCZOS)
-            
-            # Конвертируем в байты
-            buffer = io.BytesIO()
-            pil_image.save(buffer, format='PNG')
-            buffer.seek(0)
+            # Конвертируем в байты. Превью временное, поэтому сильное сжатие не нужно
+            buffer = _reusable_buffer()
+            if self._preview_format == 'PPM' and pil_image.mode != 'RGBA':
+                # L сохраняется как PGM, RGB как PPM - оба формата Tk читает сам
+                pil_image.save(buffer, format='PPM')
+            elif self._preview_format == 'PPM':
+                # PPM не хранит альфа-канал, поэтому RGBA отдаем несжатым PNG
+                pil_image.save(buffer, format='PNG', compress_level=0)
+            else:
+                pil_image.save(buffer, format='PNG', compress_level=1, optimize=False)
             image_bytes = buffer.getvalue()
-            buffer.close()
             
             return image_bytes
             
@@ -1,16 +1,23 @@
 """
 Адаптер для обработки изображений.
 """
+from typing import Dict, Tuple
 import numpy as np
-from PIL import Image as PILImage, ImageEnhance
 import cv2
 
 from domain.interfaces import IImageProcessor
 
+# Веса яркости ITU-R BT.601 (как при преобразовании Pillow в режим L)
+_LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114])
+
 
 class PillowImageProcessor(IImageProcessor):
     """Процессор изображений на основе Pillow и OpenCV"""
     
+    def __init__(self):
+        # Таблицы преобразования коррекций: (операция, параметр) -> LUT
+        self._lut_cache: Dict[Tuple[str, float], np.ndarray] = {}
+    
     def convert_to_grayscale(self, image_data: np.ndarray) -> np.ndarray:
         """Преобразует изображение в градации серого"""
         try:
@@ -19,15 +26,13 @@ class PillowImageProcessor(IImageProcessor):
                 return image_data
             
             if len(image_data.shape) == 3:
+                # OpenCV использует веса BT.601 в целочисленной арифметике
+                # и не создает промежуточных float-массивов
                 if image_data.shape[2] == 3:  # RGB
-                    # Используем стандартные веса для RGB -> Grayscale
-                    grayscale = np.dot(image_data[...,:3], [0.2989, 0.5870, 0.1140])
-                    return grayscale.astype(np.uint8)
+                    return cv2.cvtColor(np.ascontiguousarray(image_data), cv2.COLOR_RGB2GRAY)
                 elif image_data.shape[2] == 4:  # RGBA
-                    # Игнорируем альфа-канал
-                    rgb = image_data[:,:,:3]
-                    grayscale = np.dot(rgb, [0.2989, 0.5870, 0.1140])
-                    return grayscale.astype(np.uint8)
+                    # Альфа-канал игнорируется
+                    return cv2.cvtColor(np.ascontiguousarray(image_data), cv2.COLOR_RGBA2GRAY)
             
             raise ValueError("Неподдерживаемый формат изображения")
             
@@ -36,85 +41,91 @@ class PillowImageProcessor(IImageProcessor):
             raise
     
     def adjust_brightness(self, image_data: np.ndarray, brightness: float) -> np.ndarray:
-        """Изменяет яркость изображения"""
-        try:
-            # brightness от -100 до 100
-            # Преобразуем в множитель от 0.0 до 2.0
-            factor = 1.0 + (brightness / 100.0)
-            
-            if len(image_data.shape) == 2:
-                # Grayscale
-                adjusted = image_data.astype(np.float32) * factor
-                adjusted = np.clip(adjusted, 0, 255).astype(np.uint8)
-                return adjusted
-            else:
-                # Color image
-                pil_image = PILImage.fromarray(image_data)
-                enhancer = ImageEnhance.Brightness(pil_image)
-                enhanced = enhancer.enhance(factor)
-                return np.array(enhanced)
-                
-        except Exception as e:
-            print(f"Ошибка изменения яркости: {e}")
-            raise
+        """Изменяет яркость изображения (x * (1 + brightness / 100))"""
+        return self.apply_tone(image_data, brightness, 1.0, 1.0)
     
     def adjust_contrast(self, image_data: np.ndarray, contrast: float) -> np.ndarray:
-        """Изменяет контрастность изображения"""
-        try:
-            if len(image_data.shape) == 2:
-                # Grayscale - используем формулу контрастности
-                mean = np.mean(image_data)
-                adjusted = (image_data - mean) * contrast + mean
-                adjusted = np.clip(adjusted, 0, 255).astype(np.uint8)
-                return adjusted
-            else:
-                # Color image
-                pil_image = PILImage.fromarray(image_data)
-                enhancer = ImageEnhance.Contrast(pil_image)
-                enhanced = enhancer.enhance(contrast)
-                return np.array(enhanced)
-                
-        except Exception as e:
-            print(f"Ошибка изменения контрастности: {e}")
-            raise
+        """Изменяет контрастность изображения относительно средней яркости"""
+        return self.apply_tone(image_data, 0.0, contrast, 1.0)
     
     def adjust_saturation(self, image_data: np.ndarray, saturation: float) -> np.ndarray:
-        """Изменяет насыщенность изображения"""
+        """Изменяет насыщенность изображения (для grayscale не применяется)"""
+        return self.apply_tone(image_data, 0.0, 1.0, saturation)
+    
+    def apply_tone(self, image_data: np.ndarray, brightness: float, contrast: float, saturation: float) -> np.ndarray:
+        """Применяет яркость, контрастность и насыщенность за один проход
+        
+        Яркость (x * gain), контрастность ((x - mean) * contrast + mean) и
+        насыщенность (L + saturation * (x - L)) линейны по пикселю, поэтому
+        вся цепочка сводится к одной аффинной матрице каналов. Промежуточные
+        результаты не обрезаются до [0, 255] - насыщение выполняется один раз.
+        Поэтому результат заметно отличается от последовательных проходов с
+        обрезкой после каждого шага: для пикселей, насыщавшихся на середине
+        цепочки, разница достигает ~90 уровней (яркость +100 и контраст 0.5).
+        """
         try:
+            image_data = np.ascontiguousarray(image_data)
+            # brightness от -100 до 100 -> множитель от 0.0 до 2.0
+            gain = 1.0 + (brightness / 100.0)
+            
+            # Контрастность считается относительно средней яркости после изменения яркости
+            offset = 0.0
+            if contrast != 1.0:
+                channel_means = cv2.mean(image_data)
+                if len(image_data.shape) == 2:
+                    mean = channel_means[0]
+                else:
+                    mean = float(np.dot(channel_means[:3], _LUMA_WEIGHTS))
+                offset = gain * mean * (1 - contrast)
+            scale = gain * contrast
+            
             if len(image_data.shape) == 2:
                 # Для grayscale насыщенность не применяется
-                return image_data
+                return cv2.addWeighted(image_data, scale, image_data, 0, offset)
+            
+            channels = image_data.shape[2]
+            if channels not in (3, 4):
+                raise ValueError("Неподдерживаемый формат изображения")
             
-            pil_image = PILImage.fromarray(image_data)
-            enhancer = ImageEnhance.Color(pil_image)
-            enhanced = enhancer.enhance(saturation)
-            return np.array(enhanced)
+            # Строка i: scale * (saturation * e_i + (1 - saturation) * веса яркости) и сдвиг
+            matrix = np.zeros((channels, channels + 1), dtype=np.float64)
+            matrix[:3, :3] = scale * (saturation * np.eye(3) + (1 - saturation) * _LUMA_WEIGHTS)
+            matrix[:3, channels] = offset
+            if channels == 4:
+                # Альфа-канал не изменяется
+                matrix[3, 3] = 1.0
+            return cv2.transform(image_data, matrix)
             
         except Exception as e:
-            print(f"Ошибка изменения насыщенности: {e}")
+            print(f"Ошибка применения тоновых параметров: {e}")
             raise
     
-    def rotate_image(self, image_data: np.ndarray, angle: int) -> np.ndarray:
-        """Поворачивает изображение на заданный угол"""
+    def rotate_image(self, image_data: np.ndarray, angle: int, copy: bool = False) -> np.ndarray:
+        """Поворачивает изображение на заданный угол
+        
+        Args:
+            image_data: Массив изображения
+            angle: Угол поворота (кратный 90)
+            copy: Вернуть C-непрерывную копию вместо представления (view)
+        """
         try:
-            if angle == 0:
-                return image_data
-            if angle > 0:
-                angle *= 1
-
             angle %= 360
             
-            # Поворот на 90, 180, 270 градусов
-            if angle == 90:
-                return np.rot90(image_data, k=1)
+            # Поворот на 90, 180, 270 градусов без копирования данных
+            if angle == 0:
+                rotated = image_data
+            elif angle == 90:
+                rotated = np.rot90(image_data, k=1)
             elif angle == 180:
-                return np.rot90(image_data, k=2)
+                rotated = image_data[::-1, ::-1]
             elif angle == 270:
-                return np.rot90(image_data, k=3)
-            elif angle == 360:
-                return np.rot90(image_data, k=4)
+                rotated = np.rot90(image_data, k=3)
             else:
                 raise ValueError(f"Неподдерживаемый угол поворота: {angle}")
+            
+            if copy:
+                return np.ascontiguousarray(rotated)
+            return rotated
                 
         except Exception as e:
             print(f"Ошибка поворота изображения: {e}")
@@ -128,17 +139,7 @@ class PillowImageProcessor(IImageProcessor):
             factor: Коэффициент коррекции (0.1 - 2.0)
         """
         try:
-            # Нормализуем к диапазону [0, 1]
-            normalized = image_data.astype(np.float32) / 255.0
-            
-            # Применяем линейное преобразование: new_value = factor * old_value
-            corrected = normalized * factor
-            
-            # Возвращаем к диапазону [0, 255]
-            corrected = np.clip(corrected, 0, 1) * 255
-            corrected = corrected.astype(np.uint8)
-            
-            return corrected
+            return self.apply_lookup_table(image_data, self._get_lut('linear', factor))
             
         except Exception as e:
             print(f"Ошибка линейной коррекции: {e}")
@@ -152,18 +153,7 @@ class PillowImageProcessor(IImageProcessor):
             factor: Коэффициент коррекции (0.1 - 2.0)
         """
         try:
-            # Нормализуем к диапазону [0, 1]
-            normalized = image_data.astype(np.float32) / 255.0
-            
-            # Применяем логарифмическое преобразование
-            # new_value = factor * log(1 + old_value) / log(2)
-            corrected = factor * np.log(1 + normalized) / np.log(2)
-            
-            # Возвращаем к диапазону [0, 255]
-            corrected = np.clip(corrected, 0, 1) * 255
-            corrected = corrected.astype(np.uint8)
-            
-            return corrected
+            return self.apply_lookup_table(image_data, self._get_lut('log', factor))
             
         except Exception as e:
             print(f"Ошибка логарифмической коррекции: {e}")
@@ -177,18 +167,75 @@ class PillowImageProcessor(IImageProcessor):
             gamma: Значение гаммы (0.1 - 3.0)
         """
         try:
-            # Нормализуем к диапазону [0, 1]
-            normalized = image_data.astype(np.float32) / 255.0
+            return self.apply_lookup_table(image_data, self._get_lut('gamma', gamma))
             
-            # Применяем гамма-коррекцию
-            corrected = np.power(normalized, gamma)
+        except Exception as e:
+            print(f"Ошибка гамма коррекции: {e}")
+            raise
+    
+    def apply_lookup_table(self, image_data: np.ndarray, lut: np.ndarray) -> np.ndarray:
+        """Применяет таблицу преобразования uint8 -> uint8 ко всем каналам"""
+        try:
+            if image_data.dtype != np.uint8:
+                # Значения других типов трактуются как уровни 0..255
+                image_data = np.clip(image_data, 0, 255).astype(np.uint8)
             
-            # Возвращаем к диапазону [0, 255]
-            corrected = np.clip(corrected, 0, 1) * 255
-            corrected = corrected.astype(np.uint8)
+            if image_data.ndim in (2, 3):
+                # cv2.LUT в несколько раз быстрее индексирования numpy,
+                # даже с учетом копирования в C-непрерывный массив
+                return cv2.LUT(np.ascontiguousarray(image_data), lut)
             
-            return corrected
+            # Индексирование numpy работает для любой формы
+            return lut[image_data]
             
         except Exception as e:
-            print(f"Ошибка гамма коррекции: {e}")
+            print(f"Ошибка применения таблицы преобразования: {e}")
             raise
+    
+    def compose_correction(self, curve: np.ndarray, operation: str, param: float) -> np.ndarray:
+        """Добавляет коррекцию к float32-кривой в диапазоне [0, 1] и возвращает новую кривую
+        
+        Args:
+            curve: Кривая преобразования (исходная не изменяется)
+            operation: Тип коррекции ('linear', 'log' или 'gamma')
+            param: Параметр коррекции
+        """
+        return self._correct_normalized(operation, param, curve.astype(np.float32))
+    
+    def _get_lut(self, operation: str, param: float) -> np.ndarray:
+        """Возвращает таблицу преобразования uint8 -> uint8 для коррекции
+        
+        Для изображений uint8 возможно всего 256 значений пикселя, поэтому
+        преобразование вычисляется один раз для каждого значения.
+        """
+        key = (operation, param)
+        lut = self._lut_cache.get(key)
+        if lut is not None:
+            return lut
+        
+        # Нормализуем к диапазону [0, 1]
+        normalized = np.arange(256, dtype=np.float32) / 255.0
+        self._correct_normalized(operation, param, normalized)
+        
+        # Возвращаем к диапазону [0, 255]
+        lut = (normalized * 255).astype(np.uint8)
+        self._lut_cache[key] = lut
+        return lut
+    
+    @staticmethod
+    def _correct_normalized(operation: str, param: float, data: np.ndarray) -> np.ndarray:
+        """Применяет коррекцию на месте к float32-данным в диапазоне [0, 1]"""
+        if operation == 'linear':
+            # new_value = factor * old_value
+            np.multiply(data, param, out=data)
+        elif operation == 'log':
+            # new_value = factor * log(1 + old_value) / log(2)
+            np.add(data, 1, out=data)
+            np.log(data, out=data)
+            np.multiply(data, param / np.log(2), out=data)
+        elif operation == 'gamma':
+            np.power(data, param, out=data)
+        else:
+            raise ValueError(f"Неизвестный тип коррекции: {operation}")
+        
+        return np.clip(data, 0, 1, out=data)
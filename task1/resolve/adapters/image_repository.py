@@ -1,173 +1,308 @@
 """
 Адаптер для работы с изображениями через Pillow.
 """
+import logging
 import os
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional, Dict, Any, List, Sequence, Tuple, Union
 import numpy as np
 from PIL import Image as PILImage, ImageEnhance
 from PIL.ExifTags import TAGS, GPSTAGS
+import cv2
 
 from domain.models import Image, ImageInfo, ColorModel, ImageFormat
 from domain.interfaces import IImageRepository, IExifReader
 
+logger = logging.getLogger(__name__)
+
+# Таблица имен EXIF тегов, собранная один раз при импорте
+_TAG_NAMES: Dict[int, str] = dict(TAGS)
+_get_tag_name = _TAG_NAMES.get
+_GPS_TAG_NAMES: Dict[int, str] = dict(GPSTAGS)
+# Указатели на вложенные IFD: сами теги хранят лишь смещения
+_EXIF_IFD_POINTER = 0x8769
+_GPS_IFD_POINTER = 0x8825
+
+# Форматы, которые читаются и записываются через OpenCV (быстрее Pillow)
+_OPENCV_FORMATS = ('JPEG', 'PNG', 'BMP')
+_OPENCV_EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'BMP': '.bmp'}
+# Режим Pillow -> ожидаемое число каналов после декодирования OpenCV
+_OPENCV_CHANNELS = {'L': 1, 'RGB': 3, 'RGBA': 4}
+# Число каналов, которое кодировщик OpenCV сохраняет без потерь
+_OPENCV_SAVE_CHANNELS = {'JPEG': (1, 3), 'PNG': (1, 3, 4), 'BMP': (1, 3)}
+# Число каналов массива -> режим Pillow при сохранении
+_MODE_BY_CHANNELS = {1: 'L', 3: 'RGB', 4: 'RGBA'}
+# Режимы, которые конвейер обработки принимает как есть
+_PIPELINE_MODES = ('RGB', 'RGBA', 'L')
+
+# Глубина цвета по режиму Pillow
+_MODE_TO_DEPTH = {
+    '1': 1,      # 1-bit pixels, black and white
+    'L': 8,      # 8-bit pixels, black and white
+    'P': 8,      # 8-bit pixels, mapped to any other mode using a color palette
+    'RGB': 24,   # 3x8-bit pixels, true color
+    'RGBA': 32,  # 4x8-bit pixels, true color with transparency mask
+    'CMYK': 32,  # 4x8-bit pixels, color separation
+    'YCbCr': 24, # 3x8-bit pixels, color video format
+    'LAB': 24,   # 3x8-bit pixels, the L*a*b* color space
+    'HSV': 24,   # 3x8-bit pixels, Hue, Saturation, Value color space
+}
+
+# Формат сохранения по расширению файла
+_EXT_TO_FORMAT = {
+    '.jpg': 'JPEG',
+    '.jpeg': 'JPEG',
+    '.png': 'PNG',
+    '.bmp': 'BMP',
+    '.tiff': 'TIFF',
+    '.tif': 'TIFF',
+    '.gif': 'GIF',
+    '.webp': 'WEBP'
+}
+
 
 class PillowImageRepository(IImageRepository):
     """Репозиторий для работы с изображениями через Pillow"""
     
-    def __init__(self, exif_reader: IExifReader):
+    def __init__(self, exif_reader: IExifReader, jpeg_quality: int = 90, png_compression: int = 1):
         self._exif_reader = exif_reader
+        self._jpeg_quality = jpeg_quality
+        self._png_compression = png_compression
     
     def load_image(self, file_path: str) -> Optional[Image]:
         """Загружает изображение из файла"""
         try:
-            if not os.path.exists(file_path):
-                return None
+            # os.stat выбросит FileNotFoundError для отсутствующего файла
+            file_size = os.stat(file_path).st_size
             
-            # Загружаем изображение
-            pil_image = PILImage.open(file_path)
-            
-            # Конвертируем в RGB если необходимо (для единообразия)
-            if pil_image.mode not in ['RGB', 'RGBA', 'L']:
-                pil_image = pil_image.convert('RGB')
-            
-            # Преобразуем в numpy array
-            image_data = np.array(pil_image)
-            
-            # Получаем информацию об изображении
-            info = self.get_image_info(file_path)
-            if not info:
-                return None
+            # Открываем файл один раз: метаданные, EXIF и пиксели читаются из одного объекта
+            with PILImage.open(file_path) as pil_image:
+                # Информацию получаем до конвертации, чтобы сохранить исходный режим
+                info = self._build_image_info(pil_image, file_path, file_size)
+                
+                # Распространенные форматы декодируем через OpenCV, остальные через Pillow
+                image_data = None
+                if pil_image.format in _OPENCV_FORMATS and pil_image.mode in _OPENCV_CHANNELS:
+                    image_data = self._decode_with_opencv(file_path, _OPENCV_CHANNELS[pil_image.mode])
+                
+                if image_data is None:
+                    # Конвертируем в RGB только если исходный режим нельзя передать дальше
+                    if pil_image.mode not in _PIPELINE_MODES:
+                        pil_image = pil_image.convert('RGB')
+                    
+                    # Преобразуем в numpy array без лишней копии буфера Pillow
+                    pil_image.load()
+                    image_data = np.asarray(pil_image)
             
-            return Image(file_path, image_data, info)
+            # Массив создан здесь же, поэтому передаем его модели без копии
+            return Image(file_path, image_data, info, takes_ownership=True)
             
         except Exception as e:
-            print(f"Ошибка загрузки изображения: {e}")
+            logger.warning("Ошибка загрузки изображения: %s", e)
+            return None
+    
+    def load_images(self, file_paths: Sequence[str]) -> List[Optional[Image]]:
+        """Загружает несколько изображений параллельно
+        
+        Pillow и OpenCV отпускают GIL при чтении и декодировании, поэтому
+        потоки перекрывают ввод-вывод разных файлов.
+        """
+        if len(file_paths) <= 1:
+            return [self.load_image(path) for path in file_paths]
+        
+        max_workers = min(len(file_paths), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.load_image, file_paths))
+    
+    def load_image_for_preview(self, file_path: str, max_size: Tuple[int, int]) -> Optional[np.ndarray]:
+        """Загружает уменьшенную копию изображения для быстрого превью"""
+        try:
+            with PILImage.open(file_path) as pil_image:
+                # Для JPEG декодер сразу уменьшает изображение в 2, 4 или 8 раз (через DCT)
+                pil_image.draft('RGB', max_size)
+                
+                if pil_image.mode not in _PIPELINE_MODES:
+                    pil_image = pil_image.convert('RGB')
+                
+                pil_image.thumbnail(max_size, PILImage.Resampling.LANCZOS)
+                return np.asarray(pil_image)
+                
+        except Exception as e:
+            logger.warning("Ошибка загрузки превью изображения: %s", e)
             return None
     
     def save_image(self, image: Image, file_path: str) -> bool:
         """Сохраняет изображение в файл с сохранением EXIF данных"""
         try:
-            # Преобразуем numpy array в PIL Image
+            # Модель хранит C-непрерывные массивы, поэтому копии здесь не нужны
             image_data = image.current_data
             
-            # Обрабатываем разные форматы данных
-            if len(image_data.shape) == 2:  # Grayscale
-                pil_image = PILImage.fromarray(image_data, mode='L')
-            elif len(image_data.shape) == 3:
-                if image_data.shape[2] == 3:  # RGB
-                    pil_image = PILImage.fromarray(image_data, mode='RGB')
-                elif image_data.shape[2] == 4:  # RGBA
-                    pil_image = PILImage.fromarray(image_data, mode='RGBA')
-                else:
-                    return False
-            else:
-                return False
-            
             # Определяем формат по расширению файла
             _, ext = os.path.splitext(file_path)
             ext = ext.lower()
+            format_name = _EXT_TO_FORMAT.get(ext, 'PNG')
             
-            format_map = {
-                '.jpg': 'JPEG',
-                '.jpeg': 'JPEG',
-                '.png': 'PNG',
-                '.bmp': 'BMP',
-                '.tiff': 'TIFF',
-                '.tif': 'TIFF',
-                '.gif': 'GIF',
-                '.webp': 'WEBP'
-            }
+            # EXIF оригинала сохранен при загрузке, повторно файл не открываем
+            exif_bytes = image.info.exif_bytes
+            
+            # Без EXIF распространенные форматы кодируем через OpenCV
+            if not (exif_bytes and format_name == 'JPEG'):
+                if self._encode_with_opencv(image_data, file_path, format_name):
+                    return True
+            
+            # Обрабатываем разные форматы данных
+            if image_data.ndim not in (2, 3) or image_data.dtype != np.uint8:
+                return False
+            channels = 1 if image_data.ndim == 2 else image_data.shape[2]
+            mode = _MODE_BY_CHANNELS.get(channels)
+            if mode is None:
+                return False
             
-            format_name = format_map.get(ext, 'PNG')
+            # frombuffer читает C-непрерывный массив напрямую, без промежуточного bytes
+            height, width = image_data.shape[:2]
+            pil_image = PILImage.frombuffer(mode, (width, height), image_data, 'raw', mode, 0, 1)
             
-            # Пытаемся сохранить EXIF данные из оригинального изображения
-            exif_bytes = None
-            try:
-                # Загружаем оригинальное изображение для получения EXIF
-                original_path = image.file_path
-                if os.path.exists(original_path):
-                    with PILImage.open(original_path) as original_image:
-                        exif_data = original_image.getexif()
-                        if exif_data:
-                            exif_bytes = exif_data.tobytes()
-            except Exception as e:
-                print(f"Предупреждение: не удалось извлечь EXIF данные: {e}")
+            # Параметры кодирования из настроек
+            save_params = {}
+            if format_name == 'JPEG':
+                save_params['quality'] = self._jpeg_quality
+            elif format_name == 'PNG':
+                save_params.update(compress_level=self._png_compression, optimize=False)
             
             # Сохраняем с EXIF данными для форматов, которые их поддерживают
             if exif_bytes and format_name in ['JPEG', 'TIFF', 'WEBP']:
-                pil_image.save(file_path, format=format_name, exif=exif_bytes)
-            else:
-                pil_image.save(file_path, format=format_name)
+                save_params['exif'] = exif_bytes
+            
+            pil_image.save(file_path, format=format_name, **save_params)
             
             return True
             
         except Exception as e:
-            print(f"Ошибка сохранения изображения: {e}")
+            logger.warning("Ошибка сохранения изображения: %s", e)
             return False
     
+    @staticmethod
+    def _decode_with_opencv(file_path: str, channels: int) -> Optional[np.ndarray]:
+        """Декодирует файл через OpenCV в RGB/RGBA/L; None, если результат не подходит"""
+        # imdecode вместо imread: imread не открывает пути с не-ASCII символами в Windows
+        raw = np.fromfile(file_path, dtype=np.uint8)
+        decoded = cv2.imdecode(raw, cv2.IMREAD_UNCHANGED)
+        if decoded is None or decoded.dtype != np.uint8:
+            return None
+        
+        decoded_channels = 1 if decoded.ndim == 2 else decoded.shape[2]
+        if decoded_channels != channels:
+            return None
+        
+        # OpenCV хранит каналы в порядке BGR
+        if channels == 3:
+            return cv2.cvtColor(decoded, cv2.COLOR_BGR2RGB)
+        if channels == 4:
+            return cv2.cvtColor(decoded, cv2.COLOR_BGRA2RGBA)
+        return decoded
+    
+    def _encode_with_opencv(self, image_data: np.ndarray, file_path: str, format_name: str) -> bool:
+        """Сохраняет изображение через OpenCV; False, если формат не поддерживается"""
+        if format_name not in _OPENCV_FORMATS:
+            return False
+        
+        channels = 1 if image_data.ndim == 2 else image_data.shape[2]
+        if channels not in _OPENCV_SAVE_CHANNELS[format_name]:
+            return False
+        
+        if channels == 3:
+            image_data = cv2.cvtColor(image_data, cv2.COLOR_RGB2BGR)
+        elif channels == 4:
+            image_data = cv2.cvtColor(image_data, cv2.COLOR_RGBA2BGRA)
+        
+        params = {
+            'JPEG': [cv2.IMWRITE_JPEG_QUALITY, self._jpeg_quality],
+            'PNG': [cv2.IMWRITE_PNG_COMPRESSION, self._png_compression],
+            'BMP': [],
+        }[format_name]
+        
+        # imencode + tofile вместо imwrite по той же причине, что и при чтении
+        success, encoded = cv2.imencode(_OPENCV_EXTENSIONS[format_name], image_data, params)
+        if not success:
+            return False
+        encoded.tofile(file_path)
+        return True
+    
     def get_image_info(self, file_path: str) -> Optional[ImageInfo]:
         """Получает информацию об изображении"""
         try:
-            if not os.path.exists(file_path):
-                return None
-            
-            # Получаем размер файла
-            file_size = os.path.getsize(file_path)
+            # os.stat выбросит FileNotFoundError для отсутствующего файла
+            file_size = os.stat(file_path).st_size
             
             # Открываем изображение для получения метаданных
             with PILImage.open(file_path) as pil_image:
-                width, height = pil_image.size
-                
-                # Определяем глубину цвета
-                mode_to_depth = {
-                    '1': 1,      # 1-bit pixels, black and white
-                    'L': 8,      # 8-bit pixels, black and white
-                    'P': 8,      # 8-bit pixels, mapped to any other mode using a color palette
-                    'RGB': 24,   # 3x8-bit pixels, true color
-                    'RGBA': 32,  # 4x8-bit pixels, true color with transparency mask
-                    'CMYK': 32,  # 4x8-bit pixels, color separation
-                    'YCbCr': 24, # 3x8-bit pixels, color video format
-                    'LAB': 24,   # 3x8-bit pixels, the L*a*b* color space
-                    'HSV': 24,   # 3x8-bit pixels, Hue, Saturation, Value color space
-                }
-                
-                color_depth = mode_to_depth.get(pil_image.mode, 24)
-                
-                # Определяем формат
-                format_name = pil_image.format or "UNKNOWN"
-                try:
-                    image_format = ImageFormat(format_name)
-                except ValueError:
-                    image_format = ImageFormat.OTHER
-                
-                # Определяем цветовую модель
-                try:
-                    color_model = ColorModel(pil_image.mode)
-                except ValueError:
-                    color_model = ColorModel.RGB
-            
-            # Получаем EXIF данные
-            exif_data = self._exif_reader.read_exif(file_path)
-            
-            # Дополнительная информация
-            additional_info = {
-                "Путь к файлу": file_path,
-                "Имя файла": os.path.basename(file_path)
-            }
-            
-            return ImageInfo(
-                file_size=file_size,
-                width=width,
-                height=height,
-                color_depth=color_depth,
-                format=image_format,
-                color_model=color_model,
-                exif_data=exif_data,
-                additional_info=additional_info
-            )
+                return self._build_image_info(pil_image, file_path, file_size)
             
         except Exception as e:
-            print(f"Ошибка получения информации об изображении: {e}")
+            logger.warning("Ошибка получения информации об изображении: %s", e)
+            return None
+    
+    def _build_image_info(self, pil_image: PILImage.Image, file_path: str, file_size: int) -> ImageInfo:
+        """Собирает информацию об уже открытом изображении"""
+        width, height = pil_image.size
+        
+        # Определяем глубину цвета (RGB и L проверяем напрямую как самые частые режимы)
+        mode = pil_image.mode
+        if mode == 'RGB':
+            color_depth = 24
+        elif mode == 'L':
+            color_depth = 8
+        else:
+            color_depth = _MODE_TO_DEPTH.get(mode, 24)
+        
+        # Определяем формат
+        image_format = ImageFormat.from_value(pil_image.format)
+        
+        # Определяем цветовую модель
+        color_model = ColorModel.from_mode(mode)
+        
+        # EXIF блок читаем из того же открытого файла, а словарь тегов строим лениво
+        exif = self._get_exif(pil_image)
+        exif_bytes = self._get_exif_bytes(exif)
+        exif_loader = partial(self._exif_reader.read_exif_from_image, exif) if exif else None
+        
+        # Дополнительная информация
+        additional_info = {
+            "Путь к файлу": file_path,
+            "Имя файла": os.path.basename(file_path)
+        }
+        
+        return ImageInfo(
+            file_size=file_size,
+            width=width,
+            height=height,
+            color_depth=color_depth,
+            format=image_format,
+            color_model=color_model,
+            additional_info=additional_info,
+            exif_bytes=exif_bytes,
+            exif_loader=exif_loader
+        )
+    
+    @staticmethod
+    def _get_exif(pil_image: PILImage.Image) -> Optional[PILImage.Exif]:
+        """Возвращает EXIF блок открытого изображения"""
+        try:
+            return pil_image.getexif()
+        except Exception as e:
+            logger.debug("Не удалось извлечь EXIF данные: %s", e)
+            return None
+    
+    @staticmethod
+    def _get_exif_bytes(exif: Optional[PILImage.Exif]) -> Optional[bytes]:
+        """Возвращает сырой EXIF блок для последующего сохранения"""
+        if not exif:
+            return None
+        try:
+            return exif.tobytes()
+        except Exception as e:
+            logger.debug("Не удалось сериализовать EXIF данные: %s", e)
             return None
 
 
@@ -176,30 +311,41 @@ class ExifReader(IExifReader):
     
     def read_exif(self, file_path: str) -> Dict[str, Any]:
         """Читает EXIF данные из файла"""
-        exif_dict = {}
-
-        print(" \n______ read_exif ______")
-        
         try:
-            # Метод 1: getexif()
             with PILImage.open(file_path) as image:
-                exif_data = image.getexif()
-                print(str(exif_data)[:100] + " ... ")
-                if exif_data:
-                    for tag_id, value in exif_data.items():
-                        tag = TAGS.get(tag_id, f"Tag{tag_id}")
-                        exif_dict[str(tag)] = str(value)
-                
-                # Метод 2: _getexif()
-                if hasattr(image, '_getexif') and image._getexif():
-                    for tag_id, value in image._getexif().items():
-                        tag = TAGS.get(tag_id, f"Tag{tag_id}")
-                        if str(tag) not in exif_dict:
-                            exif_dict[str(tag)] = str(value)
-        except:
-            import traceback
-            traceback.print_exc()
-            pass
+                return self.read_exif_from_image(image)
+        except Exception:
+            logger.debug("Не удалось прочитать EXIF из %s", file_path, exc_info=True)
+            return {}
+    
+    def read_exif_from_image(self, image: Union[PILImage.Image, PILImage.Exif]) -> Dict[str, Any]:
+        """Читает EXIF данные из уже открытого изображения или готового EXIF блока"""
+        exif_dict = {}
         
+        try:
+            # getexif() отдает только IFD0: теги съемки и GPS лежат во вложенных IFD
+            exif_data = image if isinstance(image, PILImage.Exif) else image.getexif()
+            if exif_data:
+                # Значения не приводятся к строке: это делает тот, кому нужен текст
+                tag_name = _get_tag_name
+                exif_dict = {
+                    (tag_name(tag_id) or "Tag%d" % tag_id): _decode_exif_value(value)
+                    for tag_id, value in exif_data.items()
+                    if tag_id not in (_EXIF_IFD_POINTER, _GPS_IFD_POINTER)
+                }
+                for tag_id, value in exif_data.get_ifd(_EXIF_IFD_POINTER).items():
+                    exif_dict[tag_name(tag_id) or "Tag%d" % tag_id] = _decode_exif_value(value)
+                gps_tag_name = _GPS_TAG_NAMES.get
+                for tag_id, value in exif_data.get_ifd(_GPS_IFD_POINTER).items():
+                    exif_dict[gps_tag_name(tag_id) or "GPSTag%d" % tag_id] = _decode_exif_value(value)
+        except Exception:
+            logger.debug("Не удалось прочитать EXIF", exc_info=True)
         
         return exif_dict
+
+
+def _decode_exif_value(value: Any) -> Any:
+    """Декодирует байтовые значения EXIF тегов, остальные возвращает как есть"""
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    return value
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from typing import Tuple
 
@@ -8,6 +9,8 @@ class Settings(BaseSettings):
     window_title: str = "Обработка изображений"
     window_theme: str = "LightBlue3"
     max_image_display_size: Tuple[int, int] = (800, 600)
+    # Формат превью для окна: PPM (без сжатия) или PNG
+    preview_format: str = "PPM"
     
     default_brightness: float = 0.0
     default_contrast: float = 1.0
@@ -17,10 +20,21 @@ class Settings(BaseSettings):
     supported_image_extensions: Tuple[str, ...] = (
         ".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".tif", ".gif", ".webp"
     )
+    # Параметры кодирования при сохранении
+    jpeg_quality: int = 90
+    png_compression: int = 1
+    
     histogram_bins: int = 256
     histogram_figure_size: Tuple[int, int] = (10, 6)
     histogram_dpi: int = 100
+    # Быстрая отрисовка гистограмм без matplotlib (упрощенный вид)
+    histogram_fast_preview: bool = False
     
     class Config:
         env_prefix = "IMAGE_PROCESSOR_"
 
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Возвращает общий экземпляр настроек (переменные окружения читаются один раз)"""
+    return Settings()
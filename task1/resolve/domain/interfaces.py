@@ -3,7 +3,7 @@
 Определяют контракты для внешних зависимостей.
 """
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, List, Sequence, Tuple
 import numpy as np
 
 from .models import Image, ImageInfo, Histogram, ImageProcessingParameters
@@ -17,6 +17,16 @@ class IImageRepository(ABC):
         """Загружает изображение из файла"""
         pass
     
+    @abstractmethod
+    def load_images(self, file_paths: Sequence[str]) -> List[Optional[Image]]:
+        """Загружает несколько изображений (порядок результатов совпадает с порядком путей)"""
+        pass
+    
+    @abstractmethod
+    def load_image_for_preview(self, file_path: str, max_size: Tuple[int, int]) -> Optional[np.ndarray]:
+        """Загружает уменьшенную копию изображения для быстрого превью"""
+        pass
+    
     @abstractmethod
     def save_image(self, image: Image, file_path: str) -> bool:
         """Сохраняет изображение в файл"""
@@ -35,6 +45,11 @@ class IExifReader(ABC):
     def read_exif(self, file_path: str) -> Dict[str, Any]:
         """Читает EXIF данные из файла"""
         pass
+    
+    @abstractmethod
+    def read_exif_from_image(self, image: Any) -> Dict[str, Any]:
+        """Читает EXIF данные из уже открытого изображения или готового EXIF блока"""
+        pass
 
 
 class IImageProcessor(ABC):
@@ -61,8 +76,13 @@ class IImageProcessor(ABC):
         pass
     
     @abstractmethod
-    def rotate_image(self, image_data: np.ndarray, angle: int) -> np.ndarray:
-        """Поворачивает изображение на заданный угол"""
+    def apply_tone(self, image_data: np.ndarray, brightness: float, contrast: float, saturation: float) -> np.ndarray:
+        """Применяет яркость, контрастность и насыщенность за один проход по изображению"""
+        pass
+    
+    @abstractmethod
+    def rotate_image(self, image_data: np.ndarray, angle: int, copy: bool = False) -> np.ndarray:
+        """Поворачивает изображение на заданный угол (по умолчанию возвращает view)"""
         pass
     
     @abstractmethod
@@ -79,6 +99,16 @@ class IImageProcessor(ABC):
     def apply_gamma_correction(self, image_data: np.ndarray, gamma: float) -> np.ndarray:
         """Применяет гамма коррекцию к изображению"""
         pass
+    
+    @abstractmethod
+    def apply_lookup_table(self, image_data: np.ndarray, lut: np.ndarray) -> np.ndarray:
+        """Применяет таблицу преобразования uint8 -> uint8 к изображению"""
+        pass
+    
+    @abstractmethod
+    def compose_correction(self, curve: np.ndarray, operation: str, param: float) -> np.ndarray:
+        """Добавляет коррекцию ('linear', 'log', 'gamma') к float32-кривой [0, 1] и возвращает новую кривую"""
+        pass
 
 
 class IHistogramService(ABC):
@@ -93,6 +123,20 @@ class IHistogramService(ABC):
     def plot_histogram(self, histogram: Histogram, title: str = "",  width: float = 10, height: float = 6) -> bytes:
         """Строит график гистограммы и возвращает его как байты"""
         pass
+    
+    @abstractmethod
+    def close(self) -> None:
+        """Освобождает ресурсы, занятые сервисом"""
+        pass
+
+
+class IHistogramPreviewService(ABC):
+    """Интерфейс сервиса быстрого превью гистограммы"""
+    
+    @abstractmethod
+    def render_histogram_preview(self, image_data: np.ndarray, width: float = 10, height: float = 6) -> bytes:
+        """Вычисляет гистограмму и сразу рисует ее, возвращая байты изображения"""
+        pass
 
 
 class IImageDisplayService(ABC):
@@ -2,8 +2,8 @@
 Доменные модели для приложения обработки изображений.
 Содержат бизнес-логику и основные сущности.
 """
-from dataclasses import dataclass
-from typing import Optional, Dict, Any, Tuple
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, Tuple, Callable
 from enum import Enum
 import numpy as np
 
@@ -16,6 +16,11 @@ class ColorModel(Enum):
     CMYK = "CMYK"
     LAB = "LAB"
     HSV = "HSV"
+    
+    @classmethod
+    def from_mode(cls, mode: Optional[str], default: Optional["ColorModel"] = None) -> "ColorModel":
+        """Возвращает модель по режиму Pillow (поиск по словарю, без исключений)"""
+        return cls._value2member_map_.get(mode, default or cls.RGB)
 
 
 class ImageFormat(Enum):
@@ -27,9 +32,14 @@ class ImageFormat(Enum):
     GIF = "GIF"
     WEBP = "WEBP"
     OTHER = "OTHER"
+    
+    @classmethod
+    def from_value(cls, value: Optional[str]) -> "ImageFormat":
+        """Возвращает формат по имени Pillow, OTHER для неизвестных"""
+        return cls._value2member_map_.get(value, cls.OTHER)
 
 
-@dataclass
+@dataclass(slots=True)
 class ImageInfo:
     """Информация об изображении"""
     file_size: int  # размер в байтах
@@ -38,8 +48,19 @@ class ImageInfo:
     color_depth: int
     format: ImageFormat
     color_model: ColorModel
-    exif_data: Dict[str, Any]
     additional_info: Dict[str, Any]
+    exif_bytes: Optional[bytes] = None  # исходный EXIF блок для записи при сохранении
+    # EXIF разбирается в словарь только при первом обращении к exif_data
+    exif_loader: Optional[Callable[[], Dict[str, Any]]] = field(default=None, repr=False, compare=False)
+    _exif_data: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+    
+    @property
+    def exif_data(self) -> Dict[str, Any]:
+        """EXIF данные (загружаются лениво)"""
+        if self._exif_data is None:
+            self._exif_data = self.exif_loader() if self.exif_loader else {}
+            self.exif_loader = None
+        return self._exif_data
     
     @property
     def resolution(self) -> Tuple[int, int]:
@@ -52,7 +73,7 @@ class ImageInfo:
         return self.file_size / (1024 * 1024)
 
 
-@dataclass
+@dataclass(slots=True)
 class Histogram:
     """Гистограмма изображения"""
     red_channel: Optional[np.ndarray] = None
@@ -69,7 +90,7 @@ class Histogram:
         ])
 
 
-@dataclass
+@dataclass(slots=True)
 class ImageProcessingParameters:
     """Параметры обработки изображения"""
     brightness: float = 0.0  # от -100 до 100
@@ -85,15 +106,45 @@ class ImageProcessingParameters:
             0.0 <= self.saturation <= 3.0 and
             self.rotation in [0, 90, 180, 270]
         )
+    
+    def approx_equal(
+        self,
+        other: Optional["ImageProcessingParameters"],
+        brightness_tol: float = 1.0,
+        factor_tol: float = 0.05
+    ) -> bool:
+        """Сравнивает параметры с допуском (разница меньше допуска считается шумом)"""
+        if other is None:
+            return False
+        return (
+            self.rotation == other.rotation and
+            abs(self.brightness - other.brightness) < brightness_tol and
+            abs(self.contrast - other.contrast) < factor_tol and
+            abs(self.saturation - other.saturation) < factor_tol
+        )
 
 
 class Image:
-    """Основная доменная модель изображения"""
+    """Основная доменная модель изображения
+    
+    Массивы пикселей хранятся как C-непрерывные uint8 и помечаются только
+    для чтения; при takes_ownership=True переданный массив хранится без
+    копирования.
+    Свойства original_data и current_data возвращают сами массивы: код,
+    которому нужно изменить данные, должен явно сделать копию.
+    """
+    
+    __slots__ = ('_file_path', '_original_data', '_current_data', '_info', '_is_modified')
     
-    def __init__(self, file_path: str, image_data: np.ndarray, info: ImageInfo):
+    def __init__(self, file_path: str, image_data: np.ndarray, info: ImageInfo, takes_ownership: bool = False):
         self._file_path = file_path
-        self._original_data = image_data.copy()
-        self._current_data = image_data.copy()
+        # Чужой массив копируем один раз, чтобы вызывающий код не изменил его позже
+        if not takes_ownership:
+            image_data = image_data.copy()
+        image_data = _as_pixel_array(image_data)
+        image_data.flags.writeable = False
+        self._original_data = image_data
+        self._current_data = image_data
         self._info = info
         self._is_modified = False
     
@@ -107,26 +158,37 @@ class Image:
     
     @property
     def original_data(self) -> np.ndarray:
-        return self._original_data.copy()
+        """Оригинальные данные (только для чтения)"""
+        return self._original_data
     
     @property
     def current_data(self) -> np.ndarray:
-        return self._current_data.copy()
+        """Текущие данные (только для чтения)"""
+        return self._current_data
     
     @property
     def is_modified(self) -> bool:
         return self._is_modified
     
     def update_data(self, new_data: np.ndarray) -> None:
-        """Обновляет данные изображения"""
-        self._current_data = new_data.copy()
+        """Обновляет данные изображения (массив передается во владение модели)"""
+        new_data = _as_pixel_array(new_data)
+        new_data.flags.writeable = False
+        self._current_data = new_data
         self._is_modified = True
     
     def reset_to_original(self) -> None:
         """Сбрасывает изображение к оригиналу"""
-        self._current_data = self._original_data.copy()
+        self._current_data = self._original_data
         self._is_modified = False
     
     def is_grayscale(self) -> bool:
         """Проверяет, является ли изображение черно-белым"""
         return len(self._current_data.shape) == 2 or self._info.color_model == ColorModel.GRAYSCALE
+
+
+def _as_pixel_array(data: np.ndarray) -> np.ndarray:
+    """Проверяет тип uint8 и приводит массив к C-непрерывному виду (без копии, если он уже такой)"""
+    if data.dtype != np.uint8:
+        raise ValueError(f"Ожидался массив uint8, получен {data.dtype}")
+    return data if data.flags.c_contiguous else np.ascontiguousarray(data)
@@ -11,17 +11,17 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from services.image_service import ImageService
 from adapters.image_repository import PillowImageRepository, ExifReader
 from adapters.image_processor import PillowImageProcessor
-from adapters.histogram_service import MatplotlibHistogramService, PillowDisplayService
+from adapters.histogram_service import MatplotlibHistogramService, PillowDisplayService, FastPreviewService
 from adapters.file_dialog_service import FreeSimpleGUIFileDialogService
 from presentation.gui import ImageProcessorGUI
-from configs import Settings
+from configs import get_settings
 
 
 class Application:
     """Главный класс приложения"""
     
     def __init__(self):
-        self._settings = Settings()
+        self._settings = get_settings()
         self._setup_dependencies()
     
     def _setup_dependencies(self) -> None:
@@ -29,10 +29,19 @@ class Application:
         
         # Создаем адаптеры (внешний слой)
         exif_reader = ExifReader()
-        image_repository = PillowImageRepository(exif_reader)
+        image_repository = PillowImageRepository(
+            exif_reader,
+            jpeg_quality=self._settings.jpeg_quality,
+            png_compression=self._settings.png_compression
+        )
         image_processor = PillowImageProcessor()
-        histogram_service = MatplotlibHistogramService()
-        display_service = PillowDisplayService()
+        histogram_service = MatplotlibHistogramService(
+            fast_preview=self._settings.histogram_fast_preview
+        )
+        display_service = PillowDisplayService(self._settings.preview_format)
+        histogram_preview_service = (
+            FastPreviewService() if self._settings.histogram_fast_preview else None
+        )
         file_dialog_service = FreeSimpleGUIFileDialogService()
         
         # Создаем сервисы (бизнес-логика)
@@ -40,7 +49,8 @@ class Application:
             image_repository=image_repository,
             image_processor=image_processor,
             histogram_service=histogram_service,
-            display_service=display_service
+            display_service=display_service,
+            histogram_preview_service=histogram_preview_service
         )
         
         # Создаем GUI (презентационный слой)
@@ -59,6 +69,8 @@ class Application:
         except Exception as e:
             print(f"Критическая ошибка приложения: {e}")
             sys.exit(1)
+        finally:
+            self._image_service.close()
 
 
 def main() -> None:
@@ -1,4 +1,12 @@
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Optional, Dict, Any, Set, Tuple, Callable
+import dataclasses
+import logging
+import os
+import time
 import FreeSimpleGUI as sg
 import io
 
@@ -6,6 +14,212 @@ from services.image_service import ImageService
 from domain.models import ImageProcessingParameters
 from domain.interfaces import IFileDialogService
 
+logger = logging.getLogger(__name__)
+
+# Типы файлов для диалогов открытия и сохранения
+_IMAGE_FILE_TYPES = (
+    ("Все изображения", "*.jpg *.jpeg *.png *.bmp *.tiff *.gif *.webp"),
+    ("JPEG", "*.jpg *.jpeg"),
+    ("PNG", "*.png"),
+    ("BMP", "*.bmp"),
+    ("TIFF", "*.tiff *.tif"),
+    ("GIF", "*.gif"),
+    ("WEBP", "*.webp"),
+    ("Все файлы", "*.*")
+)
+
+# Кастомная тема приложения
+_CUSTOM_THEME = {
+    'BACKGROUND': '#422F28',
+    'TEXT': '#CDB89D',
+    'INPUT': '#6A6F4C',
+    'TEXT_INPUT': '#CDB89D',
+    'SCROLL': '#5E2611',
+    'BUTTON': ('#CDB89D', '#6A6F4C'),  # (текст, фон)
+    'PROGRESS': ('#6A6F4C', '#5E2611'),
+    'BORDER': 1,
+    'SLIDER_DEPTH': 0,
+    'PROGRESS_DEPTH': 0,
+}
+
+# Шрифты заголовков и кнопок
+_HEADER_FONT = ('Arial', 12, 'bold')
+_SUBHEADER_FONT = ('Arial', 11, 'bold')
+_BUTTON_FONT = ('Arial', 10, 'bold')
+_FRAME_FONT = ('Arial', 10)
+
+# Оформление кнопок окон гистограмм
+_DIALOG_BUTTON_STYLE = {
+    'button_color': ('#CDB89D', '#6A6F4C'),
+    'border_width': 3,
+    'mouseover_colors': ('#CDB89D', '#7A7F5C'),  # Светлее при наведении
+    'font': _BUTTON_FONT
+}
+# Оформление кнопок главного окна
+_BUTTON_STYLE = {
+    **_DIALOG_BUTTON_STYLE,
+    'pad': (10, 5),  # Отступы внутри кнопки для более объемного вида
+    'auto_size_button': False
+}
+# Оформление рамок панели информации
+_FRAME_STYLE = {
+    'font': _FRAME_FONT,
+    'pad': (5, 5),
+    'title_color': '#CDB89D',
+    'background_color': '#422F28',
+    'border_width': 2,
+    'relief': 'solid'
+}
+# Оформление слайдеров
+_SLIDER_STYLE = {
+    'orientation': 'h',
+    'background_color': '#6A6F4C',
+    'trough_color': '#5E2611'
+}
+
+# Строки панели информации: (подпись, ключ значения)
+_BASIC_INFO_ROWS = (
+    ('Размер файла:', '-FILE_SIZE-'),
+    ('Разрешение:', '-RESOLUTION-'),
+    ('Глубина цвета:', '-COLOR_DEPTH-'),
+    ('Формат файла:', '-FORMAT-'),
+    ('Цветовая модель:', '-COLOR_MODEL-'),
+    ('Модифицировано:', '-MODIFIED-'),
+)
+# Строки с копируемыми значениями: (подпись, ключ значения, ключ кнопки)
+_FILE_INFO_ROWS = (
+    ('Путь к файлу:', '-FILE_PATH-', '-COPY_PATH-'),
+    ('Имя файла:', '-FILE_NAME-', '-COPY_NAME-'),
+)
+# Строки слайдеров: (подпись, ширина подписи, ключ, диапазон, значение, шаг, длина, кнопка)
+_PARAM_SLIDER_ROWS = (
+    ('Яркость:', 12, '-BRIGHTNESS-', (-100, 100), 0, None, 15, '-BRIGHTNESS_APPLY-'),
+    ('Контрастность:', 12, '-CONTRAST-', (0.1, 3.0), 1.0, 0.1, 15, '-CONTRAST_APPLY-'),
+    ('Насыщенность:', 12, '-SATURATION-', (0.0, 3.0), 1.0, 0.1, 15, '-SATURATION_APPLY-'),
+)
+_CORRECTION_SLIDER_ROWS = (
+    ('Линейная:', 8, '-LINEAR_FACTOR-', (0.1, 2.0), 1.0, 0.1, 15, '-LINEAR_CORRECT-'),
+    ('Логарифмическая:', 12, '-LOG_FACTOR-', (0.1, 2.0), 1.0, 0.1, 11, '-LOG_CORRECT-'),
+    ('Гамма:', 8, '-GAMMA_FACTOR-', (0.1, 3.0), 1.0, 0.1, 15, '-GAMMA_CORRECT-'),
+)
+
+# Слайдеры параметров обработки -> поле ImageProcessingParameters
+_PARAM_SLIDERS = {
+    '-BRIGHTNESS-': 'brightness',
+    '-CONTRAST-': 'contrast',
+    '-SATURATION-': 'saturation',
+}
+# Пауза после последнего движения слайдера, после которой параметры применяются
+_SLIDER_DEBOUNCE_SECONDS = 0.15
+# Период опроса цикла событий, пока есть отложенная или фоновая работа (мс)
+_BUSY_POLL_MS = 50
+# Число закодированных превью, которые хранятся для повторного показа
+_PREVIEW_CACHE_SIZE = 4
+# Поля панели информации об изображении
+_INFO_KEYS = (
+    '-FILE_SIZE-', '-RESOLUTION-', '-COLOR_DEPTH-', '-FORMAT-', '-COLOR_MODEL-',
+    '-MODIFIED-', '-FILE_PATH-', '-FILE_NAME-', '-EXIF_INFO-'
+)
+# Текст статусной строки при запуске
+_INITIAL_STATUS = 'Статус: Готов к работе'
+# EXIF выводится в Multiline: текст заменяется целиком и показывается с начала
+_INFO_UPDATE_OPTIONS = {
+    '-EXIF_INFO-': {'append': False, 'autoscroll': False},
+}
+# Элементы, доступные только при загруженном изображении
+_IMAGE_CONTROLS = (
+    '-SAVE-', '-RESET-', '-GRAYSCALE-', '-ROTATE-',
+    '-HIST_CURRENT-', '-HIST_ORIGINAL-', '-HIST_COMPARE-',
+    '-BRIGHTNESS_APPLY-', '-CONTRAST_APPLY-', '-SATURATION_APPLY-',
+    '-LINEAR_CORRECT-', '-LOG_CORRECT-', '-GAMMA_CORRECT-'
+)
+# Заголовки одиночных гистограмм по типу
+_HISTOGRAM_TITLES = {
+    'current': '(Текущее)',
+    'original': '(Оригинальное)',
+}
+
+
+# Префикс ключей EXIF в словаре информации об изображении
+_EXIF_PREFIX = 'EXIF: '
+# Максимальное число строк EXIF в панели информации
+_EXIF_MAX_LINES = 30
+
+
+def _preview_cache_key(version: int, params: ImageProcessingParameters) -> Tuple:
+    """Ключ кеша превью: версия данных сервиса и примененные параметры"""
+    return (version, params.brightness, params.contrast, params.saturation, params.rotation)
+
+
+def _format_exif_line(key: str, value: Any) -> str:
+    """Форматирует строку EXIF для панели информации (длинные значения обрезаются)"""
+    text = value if isinstance(value, str) else str(value)
+    if len(text) > 50:
+        text = text[:47] + '...'
+    return f'{key[len(_EXIF_PREFIX):]:<20}: {text}'
+
+
+def _slider_row(spec: Tuple, enable_events: bool = True) -> list:
+    """Строит строку макета: подпись, слайдер и кнопка применения"""
+    label, label_width, key, value_range, default, resolution, length, button_key = spec
+    return [
+        sg.Text(label, size=(label_width, 1), text_color='#CDB89D'),
+        sg.Slider(range=value_range, default_value=default, resolution=resolution,
+                  size=(length, 15), key=key, enable_events=enable_events, **_SLIDER_STYLE),
+        sg.Button('Применить', key=button_key, size=(8, 1), disabled=True, **_BUTTON_STYLE)
+    ]
+
+
+# Тема настраивается один раз за процесс, даже если окон создается несколько
+_theme_installed = False
+
+
+def _install_custom_theme() -> None:
+    """Настраивает кастомную тему с указанными цветами (один раз за процесс)"""
+    global _theme_installed
+    if _theme_installed:
+        return
+    _theme_installed = True
+    
+    sg.theme_add_new('CustomDark', _CUSTOM_THEME)
+    sg.theme('CustomDark')
+    
+    # Настраиваем параметры кнопок по умолчанию
+    sg.set_options(
+        button_color=('#CDB89D', '#6A6F4C'),
+        border_width=2,
+        element_padding=(5, 5),
+        font=_FRAME_FONT,
+        text_color='#CDB89D',
+        background_color='#422F28',
+        element_background_color='#422F28',
+        input_elements_background_color='#6A6F4C',
+        input_text_color='#CDB89D',
+        scrollbar_color='#5E2611'
+    )
+    
+    # Применяем стили для закругленных кнопок через ttk
+    try:
+        import tkinter.ttk as ttk
+        style = ttk.Style()
+        style.theme_use('clam')
+        
+        # Настройка стиля кнопок с закруглением
+        style.configure('Rounded.TButton',
+                      background='#6A6F4C',
+                      foreground='#CDB89D',
+                      bordercolor='#5E2611',
+                      borderwidth=3,
+                      relief='raised',
+                      font=_BUTTON_FONT)
+        
+        style.map('Rounded.TButton',
+                 background=[('active', '#7A7F5C'), ('pressed', '#5A5F4C')],
+                 foreground=[('active', '#CDB89D')],
+                 relief=[('pressed', 'sunken')])
+    except Exception as e:
+        logger.warning("Не удалось настроить ttk стили: %s", e)
+
 
 class ImageProcessorGUI:
     """Главное окно приложения для обработки изображений"""
@@ -14,175 +228,107 @@ class ImageProcessorGUI:
         self._image_service = image_service
         self._file_dialog_service = file_dialog_service
         self._window: Optional[sg.Window] = None
-        self._current_histogram_window: Optional[sg.Window] = None
+        # Окна гистограмм создаются при первом показе и затем только скрываются
+        self._histogram_window: Optional[sg.Window] = None
+        self._comparison_window: Optional[sg.Window] = None
         
         self._processing_params = ImageProcessingParameters()
         
-        # Настраиваем кастомную тему с указанными цветами
-        self._setup_custom_theme()
-        
-        self._image_file_types = (
-            ("Все изображения", "*.jpg *.jpeg *.png *.bmp *.tiff *.gif *.webp"),
-            ("JPEG", "*.jpg *.jpeg"),
-            ("PNG", "*.png"),
-            ("BMP", "*.bmp"),
-            ("TIFF", "*.tiff *.tif"),
-            ("GIF", "*.gif"),
-            ("WEBP", "*.webp"),
-            ("Все файлы", "*.*")
-        )
-    
-    def _setup_custom_theme(self) -> None:
-        """Настраивает кастомную тему с указанными цветами"""
-        # Создаем кастомную тему
-        custom_theme = {
-            'BACKGROUND': '#422F28',
-            'TEXT': '#CDB89D',
-            'INPUT': '#6A6F4C',
-            'TEXT_INPUT': '#CDB89D',
-            'SCROLL': '#5E2611',
-            'BUTTON': ('#CDB89D', '#6A6F4C'),  # (текст, фон)
-            'PROGRESS': ('#6A6F4C', '#5E2611'),
-            'BORDER': 1,
-            'SLIDER_DEPTH': 0,
-            'PROGRESS_DEPTH': 0,
-        }
+        # Отложенное применение параметров при перемещении слайдеров
+        self._pending_params_dirty = False
+        self._last_slider_ts = 0.0
+        self._last_applied_params: Optional[ImageProcessingParameters] = None
+        self._apply_generation = 0
         
-        sg.theme_add_new('CustomDark', custom_theme)
-        sg.theme('CustomDark')
-        
-        # Настраиваем параметры кнопок по умолчанию
-        sg.set_options(
-            button_color=('#CDB89D', '#6A6F4C'),
-            border_width=2,
-            element_padding=(5, 5),
-            font=('Arial', 10),
-            text_color='#CDB89D',
-            background_color='#422F28',
-            element_background_color='#422F28',
-            input_elements_background_color='#6A6F4C',
-            input_text_color='#CDB89D',
-            scrollbar_color='#5E2611'
-        )
+        # Закодированные превью по (изображение, примененные параметры)
+        self._preview_cache: "OrderedDict[Tuple, bytes]" = OrderedDict()
         
-        # Применяем стили для закругленных кнопок через ttk
-        try:
-            import tkinter.ttk as ttk
-            style = ttk.Style()
-            style.theme_use('clam')
-            
-            # Настройка стиля кнопок с закруглением
-            style.configure('Rounded.TButton',
-                          background='#6A6F4C',
-                          foreground='#CDB89D',
-                          bordercolor='#5E2611',
-                          borderwidth=3,
-                          relief='raised',
-                          font=('Arial', 10, 'bold'))
-            
-            style.map('Rounded.TButton',
-                     background=[('active', '#7A7F5C'), ('pressed', '#5A5F4C')],
-                     foreground=[('active', '#CDB89D')],
-                     relief=[('pressed', 'sunken')])
-        except Exception as e:
-            print(f"Предупреждение: не удалось настроить ttk стили: {e}")
+        # Кодирование превью и отрисовка гистограмм выполняются вне потока GUI;
+        # поколения позволяют отбросить результаты устаревших запросов
+        self._executor = ThreadPoolExecutor(max_workers=2)
+        self._preview_generation = 0
+        self._pending_preview_key: Optional[Tuple] = None
+        self._histogram_generation = 0
+        self._inflight_futures: Set[Future] = set()
+        # Загрузка или сохранение файла, выполняющиеся в фоне
+        self._file_task_running = False
+        self._load_generation = 0
+        
+        # Последние значения, выведенные в текстовые элементы окна
+        self._last_values: Dict[str, str] = dict.fromkeys(_INFO_KEYS, '')
+        self._last_values['-STATUS-'] = _INITIAL_STATUS
+        # Текущее состояние элементов управления (в макете все выключены)
+        self._controls_enabled = False
+        # Элементы управления главного окна (находятся по ключам один раз)
+        self._control_elements: Tuple[Any, ...] = ()
+        # Файл, информация о котором сейчас показана в панели
+        self._info_signature: Optional[Tuple[str, int, int]] = None
+        self._info_generation = 0
+        
+        # Таблица обработчиков событий главного окна
+        self._handlers = self._build_event_handlers()
+        
+        # Настраиваем кастомную тему с указанными цветами
+        _install_custom_theme()
     
     def create_layout(self) -> list:
-        """Создает макет интерфейса"""
-        
-        # Параметры для кнопок с анимацией и закругленными краями
-        button_style = {
-            'button_color': ('#CDB89D', '#6A6F4C'),
-            'border_width': 3,
-            'mouseover_colors': ('#CDB89D', '#7A7F5C'),  # Светлее при наведении
-            'font': ('Arial', 10, 'bold'),
-            'pad': (10, 5),  # Отступы внутри кнопки для более объемного вида
-            'auto_size_button': False
-        }
+        """Создает макет интерфейса по описаниям строк из констант модуля"""
         
         # Колонка с изображением
         image_column = [
-            [sg.Text('Изображение:', font=('Arial', 12, 'bold'), text_color='#CDB89D')],
+            [sg.Text('Изображение:', font=_HEADER_FONT, text_color='#CDB89D')],
             [sg.Image(key='-IMAGE-', size=(800, 600), background_color='#422F28')],
             [sg.HorizontalSeparator()],
             [
-                sg.Button('Загрузить изображение', key='-LOAD-', size=(20, 1), **button_style),
-                sg.Button('Сохранить изображение', key='-SAVE-', size=(20, 1), disabled=True, **button_style),
-                sg.Button('Сбросить к оригиналу', key='-RESET-', size=(20, 1), disabled=True, **button_style)
+                sg.Button('Загрузить изображение', key='-LOAD-', size=(20, 1), **_BUTTON_STYLE),
+                sg.Button('Сохранить изображение', key='-SAVE-', size=(20, 1), disabled=True, **_BUTTON_STYLE),
+                sg.Button('Сбросить к оригиналу', key='-RESET-', size=(20, 1), disabled=True, **_BUTTON_STYLE)
             ]
         ]
         
         # Колонка с информацией об изображении
         info_column = [
-            [sg.Text('Информация об изображении:', font=('Arial', 12, 'bold'), text_color='#CDB89D')],
+            [sg.Text('Информация об изображении:', font=_HEADER_FONT, text_color='#CDB89D')],
             [sg.Frame('Основные параметры', [
-                [sg.Text('Размер файла:', size=(15, 1), text_color='#CDB89D'), sg.Text('', key='-FILE_SIZE-', size=(25, 1), text_color='#CDB89D')],
-                [sg.Text('Разрешение:', size=(15, 1), text_color='#CDB89D'), sg.Text('', key='-RESOLUTION-', size=(25, 1), text_color='#CDB89D')],
-                [sg.Text('Глубина цвета:', size=(15, 1), text_color='#CDB89D'), sg.Text('', key='-COLOR_DEPTH-', size=(25, 1), text_color='#CDB89D')],
-                [sg.Text('Формат файла:', size=(15, 1), text_color='#CDB89D'), sg.Text('', key='-FORMAT-', size=(25, 1), text_color='#CDB89D')],
-                [sg.Text('Цветовая модель:', size=(15, 1), text_color='#CDB89D'), sg.Text('', key='-COLOR_MODEL-', size=(25, 1), text_color='#CDB89D')],
-                [sg.Text('Модифицировано:', size=(15, 1), text_color='#CDB89D'), sg.Text('', key='-MODIFIED-', size=(25, 1), text_color='#CDB89D')],
-            ], font=('Arial', 10), pad=(5, 5), title_color='#CDB89D', background_color='#422F28', border_width=2, relief='solid')],
+                [sg.Text(label, size=(15, 1), text_color='#CDB89D'), sg.Text('', key=key, size=(25, 1), text_color='#CDB89D')]
+                for label, key in _BASIC_INFO_ROWS
+            ], **_FRAME_STYLE)],
             [sg.Frame('Дополнительная информация', [
-                [sg.Text('Путь к файлу:', size=(10, 1), text_color='#CDB89D'), sg.Text('', key='-FILE_PATH-', size=(22, 1), text_color='#CDB89D'), sg.Button('Копировать', key='-COPY_PATH-', size=(12, 1), **button_style)],
-                [sg.Text('Имя файла:', size=(10, 1), text_color='#CDB89D'), sg.Text('', key='-FILE_NAME-', size=(22, 1), text_color='#CDB89D'), sg.Button('Копировать', key='-COPY_NAME-', size=(12, 1), **button_style)],
-            ], font=('Arial', 10), pad=(5, 5), title_color='#CDB89D', background_color='#422F28', border_width=2, relief='solid')],
+                [
+                    sg.Text(label, size=(10, 1), text_color='#CDB89D'),
+                    sg.Text('', key=key, size=(22, 1), text_color='#CDB89D'),
+                    sg.Button('Копировать', key=copy_key, size=(12, 1), **_BUTTON_STYLE)
+                ]
+                for label, key, copy_key in _FILE_INFO_ROWS
+            ], **_FRAME_STYLE)],
             [sg.Frame('EXIF данные', [
-                [sg.Multiline('', key='-EXIF_INFO-', size=(40, 12), disabled=True, font=('Courier', 9), background_color='#5E2611', text_color='#CDB89D', autoscroll=True)]
-            ], font=('Arial', 10), pad=(5, 5), title_color='#CDB89D', background_color='#422F28', border_width=2, relief='solid')],
+                [sg.Multiline('', key='-EXIF_INFO-', size=(40, 12), disabled=True, font=('Courier', 9), background_color='#5E2611', text_color='#CDB89D', autoscroll=False)]
+            ], **_FRAME_STYLE)],
             [sg.HorizontalSeparator()],
-            [sg.Text('Гистограмма:', font=('Arial', 11, 'bold'), text_color='#CDB89D')],
+            [sg.Text('Гистограмма:', font=_SUBHEADER_FONT, text_color='#CDB89D')],
             [
-                sg.Button('Показать текущую', key='-HIST_CURRENT-', size=(18, 1), disabled=True, **button_style),
-                sg.Button('Показать оригинальную', key='-HIST_ORIGINAL-', size=(18, 1), disabled=True, **button_style)
+                sg.Button('Показать текущую', key='-HIST_CURRENT-', size=(18, 1), disabled=True, **_BUTTON_STYLE),
+                sg.Button('Показать оригинальную', key='-HIST_ORIGINAL-', size=(18, 1), disabled=True, **_BUTTON_STYLE)
             ],
             [
-                sg.Button('Сравнить гистограммы', key='-HIST_COMPARE-', size=(37, 1), disabled=True, **button_style)
+                sg.Button('Сравнить гистограммы', key='-HIST_COMPARE-', size=(37, 1), disabled=True, **_BUTTON_STYLE)
             ]
         ]
 
         processing_column = [
-            [sg.Text('Параметры обработки:', font=('Arial', 12, 'bold'), text_color='#CDB89D')],
-            [
-                sg.Text('Яркость:', size=(12, 1), text_color='#CDB89D'),
-                sg.Slider(range=(-100, 100), default_value=0, orientation='h', size=(15, 15), key='-BRIGHTNESS-', background_color='#6A6F4C', trough_color='#5E2611'),
-                sg.Button('Применить', key='-BRIGHTNESS_APPLY-', size=(8, 1), disabled=True, **button_style)
-            ],
-            [
-                sg.Text('Контрастность:', size=(12, 1), text_color='#CDB89D'),
-                sg.Slider(range=(0.1, 3.0), default_value=1.0, resolution=0.1, orientation='h',
-                         size=(15, 15), key='-CONTRAST-', background_color='#6A6F4C', trough_color='#5E2611'),
-                sg.Button('Применить', key='-CONTRAST_APPLY-', size=(8, 1), disabled=True, **button_style)
-            ],
-            [
-                sg.Text('Насыщенность:', size=(12, 1), text_color='#CDB89D'),
-                sg.Slider(range=(0.0, 3.0), default_value=1.0, resolution=0.1, orientation='h',
-                         size=(15, 15), key='-SATURATION-', background_color='#6A6F4C', trough_color='#5E2611'),
-                sg.Button('Применить', key='-SATURATION_APPLY-', size=(8, 1), disabled=True, **button_style)
-            ],
+            [sg.Text('Параметры обработки:', font=_HEADER_FONT, text_color='#CDB89D')],
+            *map(_slider_row, _PARAM_SLIDER_ROWS),
             [sg.HorizontalSeparator()],
-            [sg.Text('Преобразования:', font=('Arial', 11, 'bold'), text_color='#CDB89D')],
+            [sg.Text('Преобразования:', font=_SUBHEADER_FONT, text_color='#CDB89D')],
             [
-                sg.Button('В градации серого', key='-GRAYSCALE-', size=(18, 1), disabled=True, **button_style),
-                sg.Button('Повернуть на 90°', key='-ROTATE-', size=(18, 1), disabled=True, **button_style)
+                sg.Button('В градации серого', key='-GRAYSCALE-', size=(18, 1), disabled=True, **_BUTTON_STYLE),
+                sg.Button('Повернуть на 90°', key='-ROTATE-', size=(18, 1), disabled=True, **_BUTTON_STYLE)
             ],
             [sg.HorizontalSeparator()],
-            [sg.Text('Коррекция изображения:', font=('Arial', 11, 'bold'), text_color='#CDB89D')],
-            [
-                sg.Text('Линейная:', size=(8, 1), text_color='#CDB89D'),
-                sg.Slider(range=(0.1, 2.0), default_value=1.0, resolution=0.1, orientation='h', size=(15, 15), key='-LINEAR_FACTOR-', enable_events=True, background_color='#6A6F4C', trough_color='#5E2611'),
-                sg.Button('Применить', key='-LINEAR_CORRECT-', size=(8, 1), disabled=True, **button_style)
-            ],
-            [
-                sg.Text('Логарифмическая:', size=(12, 1), text_color='#CDB89D'),
-                sg.Slider(range=(0.1, 2.0), default_value=1.0, resolution=0.1, orientation='h', size=(11, 15), key='-LOG_FACTOR-', enable_events=True, background_color='#6A6F4C', trough_color='#5E2611'),
-                sg.Button('Применить', key='-LOG_CORRECT-', size=(8, 1), disabled=True, **button_style)
-            ],
-            [
-                sg.Text('Гамма:', size=(8, 1), text_color='#CDB89D'),
-                sg.Slider(range=(0.1, 3.0), default_value=1.0, resolution=0.1, orientation='h', size=(15, 15), key='-GAMMA_FACTOR-', enable_events=True, background_color='#6A6F4C', trough_color='#5E2611'),
-                sg.Button('Применить', key='-GAMMA_CORRECT-', size=(8, 1), disabled=True, **button_style)
-            ]
+            [sg.Text('Коррекция изображения:', font=_SUBHEADER_FONT, text_color='#CDB89D')],
+            # Коррекции накапливаются и применяются только кнопкой, поэтому
+            # слайдеры коэффициентов не создают событий при перемещении
+            *map(partial(_slider_row, enable_events=False), _CORRECTION_SLIDER_ROWS)
         ]
         right_column_scrollable = [
             [sg.Column(info_column, vertical_alignment='top')],
@@ -205,9 +351,9 @@ class ImageProcessorGUI:
             ],
             [sg.HorizontalSeparator()],
             [
-                sg.Text('Статус: Готов к работе', key='-STATUS-', text_color='#CDB89D'),
+                sg.Text(_INITIAL_STATUS, key='-STATUS-', text_color='#CDB89D'),
                 sg.Push(),
-                sg.Button('Выход', key='-EXIT-', **button_style)
+                sg.Button('Выход', key='-EXIT-', **_BUTTON_STYLE)
             ]
         ]
         
@@ -231,7 +377,7 @@ class ImageProcessorGUI:
     def update_status(self, message: str) -> None:
         """Обновляет статусную строку"""
         if self._window:
-            self._window['-STATUS-'].update(f'Статус: {message}')
+            self._push_fields({'-STATUS-': f'Статус: {message}'})
     
     def update_image_display(self) -> None:
         """Обновляет отображение изображения"""
@@ -239,76 +385,177 @@ class ImageProcessorGUI:
             if not self._image_service.current_image:
                 return
             
-            image_bytes = self._image_service.prepare_image_for_display()
-            if image_bytes and self._window:
-                self._window['-IMAGE-'].update(data=image_bytes)
+            key = _preview_cache_key(
+                self._image_service.version,
+                self._image_service.get_current_processing_params()
+            )
+            image_bytes = self._preview_cache.get(key)
+            if image_bytes is not None:
+                self._preview_cache.move_to_end(key)
+                self._pending_preview_key = None
+                if self._window:
+                    self._window['-IMAGE-'].update(data=image_bytes)
+                return
+            
+            # Такое же превью уже кодируется в фоне
+            if key == self._pending_preview_key:
+                return
+            
+            self._preview_generation += 1
+            self._pending_preview_key = key
+            self._submit_task(
+                '-PREVIEW_READY-', self._preview_generation,
+                self._image_service.prepare_image_snapshot_for_display
+            )
                 
         except Exception as e:
             self.update_status(f'Ошибка отображения: {str(e)}')
     
+    def on_preview_ready(self, result: Tuple[int, Future]) -> None:
+        """Показывает превью, закодированное в фоновом потоке"""
+        generation, future = result
+        if generation != self._preview_generation:
+            return
+        self._pending_preview_key = None
+        
+        try:
+            snapshot = future.result()
+        except Exception as e:
+            self.update_status(f'Ошибка отображения: {str(e)}')
+            return
+        
+        if not snapshot:
+            return
+        
+        # Ключ строится по версии и параметрам, прочитанным вместе с данными в фоне:
+        # применение параметров, завершившееся после запроса, не попадет под старый ключ
+        version, params, image_bytes = snapshot
+        self._preview_cache[_preview_cache_key(version, params)] = image_bytes
+        if len(self._preview_cache) > _PREVIEW_CACHE_SIZE:
+            self._preview_cache.popitem(last=False)
+        if self._window:
+            self._window['-IMAGE-'].update(data=image_bytes)
+    
+    def _submit_task(self, event: str, tag: Any, fn: Callable, *args: Any) -> None:
+        """Выполняет функцию в фоне и возвращает результат в цикл событий окна"""
+        self._track_future(event, tag, self._executor.submit(fn, *args))
+    
+    def _track_future(self, event: str, tag: Any, future: Future) -> None:
+        """Передает результат фоновой задачи в цикл событий окна по ее завершении"""
+        self._inflight_futures.add(future)
+        future.add_done_callback(lambda f: self._post_event(event, (tag, f)))
+        future.add_done_callback(self._inflight_futures.discard)
+    
+    def _post_event(self, event: str, value: Any) -> None:
+        """Передает событие в главное окно из фонового потока"""
+        window = self._window
+        if window is None:
+            return
+        try:
+            window.write_event_value(event, value)
+        except Exception:
+            # Окно уже закрыто - результат никому не нужен
+            pass
+    
+    def invalidate_preview_cache(self) -> None:
+        """Сбрасывает кеш превью после изменений, не отраженных в параметрах"""
+        self._preview_cache.clear()
+        self._pending_preview_key = None
+    
     def update_image_info(self) -> None:
-        """Обновляет информацию об изображении"""
+        """Запрашивает информацию об изображении (разбор EXIF выполняется в фоне)"""
+        self._info_generation += 1
+        self._submit_task('-INFO_READY-', self._info_generation, self._collect_image_info)
+    
+    def _collect_image_info(self) -> Optional[Dict[str, str]]:
+        """Собирает значения полей панели информации (выполняется в фоновом потоке)"""
+        info = self._image_service.get_image_info()
+        if not info:
+            return None
+        
+        file_path = info.get('Путь к файлу', '')
+        if len(file_path) > 40:
+            file_path = '...' + file_path[-37:]
+        
+        # Фильтрация и форматирование строк EXIF за один проход,
+        # форматируются только строки, которые попадут в панель
+        exif_items = ((key, value) for key, value in info.items() if key.startswith(_EXIF_PREFIX))
+        exif_text = '\n'.join(
+            _format_exif_line(key, value)
+            for key, value in islice(exif_items, _EXIF_MAX_LINES)
+        ) or 'EXIF данные отсутствуют или недоступны'
+        
+        return {
+            '-FILE_SIZE-': info.get('Размер файла', ''),
+            '-RESOLUTION-': info.get('Разрешение', ''),
+            '-COLOR_DEPTH-': info.get('Глубина цвета', ''),
+            '-FORMAT-': info.get('Формат файла', ''),
+            '-COLOR_MODEL-': info.get('Цветовая модель', ''),
+            '-MODIFIED-': info.get('Модифицировано', ''),
+            '-FILE_PATH-': file_path,
+            '-FILE_NAME-': info.get('Имя файла', ''),
+            '-EXIF_INFO-': exif_text,
+        }
+    
+    def on_info_ready(self, result: Tuple[int, Future]) -> None:
+        """Выводит информацию об изображении, собранную в фоновом потоке"""
+        generation, future = result
+        if generation != self._info_generation:
+            return
+        
         try:
-            info = self._image_service.get_image_info()
-            if info and self._window:
-                self._window['-FILE_SIZE-'].update(info.get('Размер файла', ''))
-                self._window['-RESOLUTION-'].update(info.get('Разрешение', ''))
-                self._window['-COLOR_DEPTH-'].update(info.get('Глубина цвета', ''))
-                self._window['-FORMAT-'].update(info.get('Формат файла', ''))
-                self._window['-COLOR_MODEL-'].update(info.get('Цветовая модель', ''))
-                self._window['-MODIFIED-'].update(info.get('Модифицировано', ''))
-                
-                file_path = info.get('Путь к файлу', '')
-                if len(file_path) > 40:
-                    file_path = '...' + file_path[-37:]
-                self._window['-FILE_PATH-'].update(file_path)
-                self._window['-FILE_NAME-'].update(info.get('Имя файла', ''))
-                
-                exif_lines = []
-                for key, value in info.items():
-                    if key.startswith('EXIF:'):
-                        exif_key = key.replace('EXIF: ', '')
-                        if len(str(value)) > 50:
-                            value = str(value)[:47] + '...'
-                        exif_lines.append(f'{exif_key:<20}: {value}')
-                
-                if exif_lines:
-                    exif_text = '\n'.join(exif_lines)
-                else:
-                    exif_text = 'EXIF данные отсутствуют или недоступны'
-                
-                self._window['-EXIF_INFO-'].update(exif_text)
-                
+            fields = future.result()
         except Exception as e:
+            self._info_signature = None
             self.update_status(f'Ошибка получения информации: {str(e)}')
+            return
+        
+        if fields and self._window:
+            self._push_fields(fields)
     
     def clear_image_info(self) -> None:
         """Очищает информацию об изображении"""
         if not self._window:
             return
         
-        self._window['-FILE_SIZE-'].update('')
-        self._window['-RESOLUTION-'].update('')
-        self._window['-COLOR_DEPTH-'].update('')
-        self._window['-FORMAT-'].update('')
-        self._window['-COLOR_MODEL-'].update('')
-        self._window['-MODIFIED-'].update('')
-        
-        self._window['-FILE_PATH-'].update('')
-        self._window['-FILE_NAME-'].update('')
-        
-        self._window['-EXIF_INFO-'].update('')
+        # Запрошенная ранее информация больше не нужна
+        self._info_generation += 1
+        self._push_fields(dict.fromkeys(_INFO_KEYS, ''))
+        self._info_signature = None
+    
+    @staticmethod
+    def _file_signature(file_path: str) -> Optional[Tuple[str, int, int]]:
+        """Возвращает (путь, время изменения, размер) файла или None при ошибке"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+    
+    def _push_fields(self, fields: Dict[str, str]) -> None:
+        """Обновляет только те текстовые элементы, значения которых изменились"""
+        for key, value in fields.items():
+            if self._last_values.get(key) != value:
+                self._window[key].update(value, **_INFO_UPDATE_OPTIONS.get(key, {}))
+                self._last_values[key] = value
     
     def copy_to_clipboard(self, text: str) -> None:
         """Копирует текст в буфер обмена"""
         try:
-            import tkinter as tk
-            root = tk.Tk()
-            root.withdraw()  # Скрываем главное окно
-            root.clipboard_clear()
-            root.clipboard_append(text)
-            root.update()  # Обновляем буфер обмена
-            root.destroy()
+            if self._window is not None:
+                # Буфер обмена принадлежит уже созданному корню Tk главного окна
+                root = self._window.TKroot
+                root.clipboard_clear()
+                root.clipboard_append(text)
+                root.update_idletasks()
+            else:
+                import tkinter as tk
+                root = tk.Tk()
+                root.withdraw()  # Скрываем главное окно
+                root.clipboard_clear()
+                root.clipboard_append(text)
+                root.update()  # Обновляем буфер обмена
+                root.destroy()
             self.update_status('Текст скопирован в буфер обмена')
         except Exception as e:
             self.update_status(f'Ошибка копирования: {str(e)}')
@@ -318,15 +565,11 @@ class ImageProcessorGUI:
         if not self._window:
             return
         
-        file_path = self._window['-FILE_PATH-'].get()
+        file_path = self._last_values.get('-FILE_PATH-')
         if file_path:
-            # Получаем полный путь из информации об изображении
-            info = self._image_service.get_image_info()
-            full_path = info.get('Путь к файлу', '')
-            if full_path:
-                self.copy_to_clipboard(full_path)
-            else:
-                self.copy_to_clipboard(file_path)
+            # Полный путь берем у загруженного изображения, без повторного сбора информации
+            image = self._image_service.current_image
+            self.copy_to_clipboard(image.file_path if image else file_path)
         else:
             self.update_status('Нет пути к файлу для копирования')
     
@@ -335,7 +578,7 @@ class ImageProcessorGUI:
         if not self._window:
             return
         
-        file_name = self._window['-FILE_NAME-'].get()
+        file_name = self._last_values.get('-FILE_NAME-')
         if file_name:
             self.copy_to_clipboard(file_name)
         else:
@@ -346,57 +589,126 @@ class ImageProcessorGUI:
         if not self._window:
             return
         
-        controls = [
-            '-SAVE-', '-RESET-', '-GRAYSCALE-', '-ROTATE-',
-            '-HIST_CURRENT-', '-HIST_ORIGINAL-', '-HIST_COMPARE-',
-            '-BRIGHTNESS_APPLY-', '-CONTRAST_APPLY-', '-SATURATION_APPLY-',
-            '-LINEAR_CORRECT-', '-LOG_CORRECT-', '-GAMMA_CORRECT-'
-        ]
+        # Элементы переключаются только все вместе, поэтому достаточно общего флага
+        if enabled == self._controls_enabled:
+            return
         
-        for control in controls:
-            self._window[control].update(disabled=not enabled)
+        if not self._control_elements:
+            self._control_elements = tuple(self._window[control] for control in _IMAGE_CONTROLS)
+        
+        disabled = not enabled
+        for element in self._control_elements:
+            element.update(disabled=disabled)
+        self._controls_enabled = enabled
     
     def load_image(self) -> None:
-        """Загружает изображение"""
+        """Загружает изображение (чтение и декодирование файла выполняются в фоне)"""
+        if self._file_task_running:
+            self.update_status('Дождитесь завершения операции с файлом')
+            return
+        
         try:
-            filename = self._file_dialog_service.open_file_dialog(self._image_file_types)
+            filename = self._file_dialog_service.open_file_dialog(_IMAGE_FILE_TYPES)
             if not filename:
                 return
             
             self.update_status('Загрузка изображения...')
             
-            if self._image_service.load_image(filename):
-                self.update_status('Изображение загружено успешно')
-                self.update_image_display()
-                self.update_image_info()
-                self.enable_image_controls(True)
-                self.reset_processing_params()
-            else:
-                self.update_status('Ошибка загрузки изображения')
-                self.clear_image_info()
-                self.enable_image_controls(False)
+            # Пока сервис заменяет изображение, редактировать старое нельзя
+            self.enable_image_controls(False)
+            self._pending_params_dirty = False
+            self._file_task_running = True
+            self._load_generation += 1
+            self._submit_task('-LOAD_DONE-', filename, self._image_service.load_image, filename)
+            # Уменьшенное превью готовится параллельно с полной загрузкой
+            self._submit_task(
+                '-FILE_PREVIEW_READY-', self._load_generation,
+                self._image_service.prepare_file_preview, filename
+            )
                 
+        except Exception as e:
+            self._file_task_running = False
+            self.update_status(f'Ошибка: {str(e)}')
+    
+    def on_file_preview_ready(self, result: Tuple[int, Future]) -> None:
+        """Показывает уменьшенное превью, пока изображение загружается полностью"""
+        generation, future = result
+        # Загрузка уже завершилась - превью только затерло бы готовое изображение
+        if generation != self._load_generation or not self._file_task_running:
+            return
+        
+        try:
+            preview_bytes = future.result()
+        except Exception:
+            return
+        
+        if preview_bytes and self._window:
+            self._window['-IMAGE-'].update(data=preview_bytes)
+    
+    def on_load_done(self, result: Tuple[str, Future]) -> None:
+        """Завершает загрузку изображения, выполненную в фоновом потоке"""
+        filename, future = result
+        self._file_task_running = False
+        
+        try:
+            loaded = future.result()
         except Exception as e:
             self.update_status(f'Ошибка: {str(e)}')
+            loaded = False
+        
+        if loaded:
+            self.invalidate_preview_cache()
+            self.update_status('Изображение загружено успешно')
+            self.update_image_display()
+            
+            # Повторная загрузка того же неизмененного файла не меняет панель информации
+            signature = self._file_signature(filename)
+            if signature is None or signature != self._info_signature:
+                self.update_image_info()
+                self._info_signature = signature
+            self.enable_image_controls(True)
+            self.reset_processing_params()
+        else:
+            self.update_status('Ошибка загрузки изображения')
+            self.clear_image_info()
+            self.enable_image_controls(False)
     
     def save_image(self) -> None:
-        """Сохраняет изображение"""
+        """Сохраняет изображение (кодирование и запись файла выполняются в фоне)"""
+        if self._file_task_running:
+            self.update_status('Дождитесь завершения операции с файлом')
+            return
+        
         try:
             filename = self._file_dialog_service.save_file_dialog(
-                self._image_file_types, ".png"
+                _IMAGE_FILE_TYPES, ".png"
             )
             if not filename:
                 return
             
             self.update_status('Сохранение изображения...')
-            
-            if self._image_service.save_image(filename):
-                self.update_status('Изображение сохранено успешно')
-            else:
-                self.update_status('Ошибка сохранения изображения')
+            self._file_task_running = True
+            self._submit_task('-SAVE_DONE-', filename, self._image_service.save_image, filename)
                 
+        except Exception as e:
+            self._file_task_running = False
+            self.update_status(f'Ошибка: {str(e)}')
+    
+    def on_save_done(self, result: Tuple[str, Future]) -> None:
+        """Сообщает результат сохранения, выполненного в фоновом потоке"""
+        _, future = result
+        self._file_task_running = False
+        
+        try:
+            saved = future.result()
         except Exception as e:
             self.update_status(f'Ошибка: {str(e)}')
+            return
+        
+        if saved:
+            self.update_status('Изображение сохранено успешно')
+        else:
+            self.update_status('Ошибка сохранения изображения')
     
     def reset_processing_params(self) -> None:
         """Сбрасывает параметры обработки"""
@@ -414,129 +726,232 @@ class ImageProcessorGUI:
         self._window['-LOG_FACTOR-'].update(1.0)
         self._window['-GAMMA_FACTOR-'].update(1.0)
         self._processing_params = ImageProcessingParameters()
+        self._last_applied_params = ImageProcessingParameters()
+        # Результаты применений, запрошенных до сброса, больше не нужны
+        self._apply_generation += 1
+        self._pending_params_dirty = False
         
         # Обновляем отображение изображения
         self.update_image_display()
     
     def apply_processing_params(self) -> None:
         """Применяет текущие параметры обработки"""
+        self._pending_params_dirty = False
+        
+        # Параметры не изменились с последнего запроса (с точностью до шума слайдера)
+        if self._processing_params.approx_equal(self._last_applied_params):
+            return
+        
+        # Сравниваем со запрошенными параметрами: применение выполняется в фоне,
+        # а более новый запрос отменяет еще не начатый
+        params = dataclasses.replace(self._processing_params)
+        self._last_applied_params = params
+        self._apply_generation += 1
         try:
-            if self._image_service.apply_processing_parameters(self._processing_params):
-                self.update_image_display()
-                self.update_status('Параметры применены')
-            else:
-                self.update_status('Ошибка применения параметров')
-                
+            future = self._image_service.apply_processing_parameters_async(params)
         except Exception as e:
+            self._last_applied_params = None
             self.update_status(f'Ошибка: {str(e)}')
+            return
+        self._track_future('-PARAMS_APPLIED-', self._apply_generation, future)
+    
+    def on_params_applied(self, result: Tuple[int, Future]) -> None:
+        """Показывает результат применения параметров в фоновом потоке"""
+        generation, future = result
+        if generation != self._apply_generation or future.cancelled():
+            return
+        
+        try:
+            applied = future.result()
+        except Exception as e:
+            self._last_applied_params = None
+            self.update_status(f'Ошибка: {str(e)}')
+            return
+        
+        if applied:
+            self.update_image_display()
+            self.update_status('Параметры применены')
+        else:
+            self._last_applied_params = None
+            self.update_status('Ошибка применения параметров')
+    
+    def on_param_slider(self, event: str, values: Dict[str, Any]) -> None:
+        """Запоминает значение слайдера; применение откладывается до паузы в перемещении"""
+        setattr(self._processing_params, _PARAM_SLIDERS[event], values[event])
+        self._pending_params_dirty = True
+        self._last_slider_ts = time.monotonic()
+    
+    def apply_pending_params(self) -> None:
+        """Применяет отложенные параметры, если слайдеры не двигались дольше порога"""
+        if not self._pending_params_dirty:
+            return
+        if time.monotonic() - self._last_slider_ts <= _SLIDER_DEBOUNCE_SECONDS:
+            return
+        
+        if self._image_service.current_image and not self._file_task_running:
+            self.apply_processing_params()
+        else:
+            self._pending_params_dirty = False
     
     def show_histogram(self, histogram_type: str) -> None:
         """Показывает гистограмму"""
+        if histogram_type == 'compare':
+            self.show_histogram_comparison()
+            return
+        if histogram_type not in _HISTOGRAM_TITLES:
+            return
+        
+        self.update_status('Построение гистограммы...')
+        self._histogram_generation += 1
+        self._submit_task(
+            '-HIST_READY-', self._histogram_generation,
+            self._render_histogram, histogram_type
+        )
+    
+    def _render_histogram(self, histogram_type: str) -> Tuple[str, Optional[bytes]]:
+        """Вычисляет и рисует гистограмму (выполняется в фоновом потоке)"""
+        title = _HISTOGRAM_TITLES[histogram_type]
+        
+        if histogram_type == 'current' and self._image_service.has_histogram_preview:
+            # Быстрый путь: пиксели -> PNG без построения модели Histogram
+            return title, self._image_service.render_histogram_preview()
+        
+        if histogram_type == 'current':
+            histogram = self._image_service.get_histogram()
+        else:
+            histogram = self._image_service.get_original_histogram()
+        
+        if not histogram:
+            return title, None
+        return title, self._image_service.plot_histogram(histogram, title)
+    
+    def on_histogram_ready(self, result: Tuple[int, Future]) -> None:
+        """Открывает окно с гистограммой, построенной в фоновом потоке"""
+        generation, future = result
+        if generation != self._histogram_generation:
+            return
+        
         try:
-            if histogram_type == 'current':
-                histogram = self._image_service.get_histogram()
-                title = '(Текущее)'
-            elif histogram_type == 'original':
-                histogram = self._image_service.get_original_histogram()
-                title = '(Оригинальное)'
-            elif histogram_type == 'compare':
-                self.show_histogram_comparison()
-                return
-            else:
-                return
-            
-            if not histogram:
-                self.update_status('Не удалось получить гистограмму')
-                return
-            
-            histogram_bytes = self._image_service.plot_histogram(histogram, title)
-            if histogram_bytes:
-                self.create_histogram_window(histogram_bytes, f'Гистограмма {title}')
-            else:
-                self.update_status('Ошибка построения гистограммы')
-                
+            title, histogram_bytes = future.result()
         except Exception as e:
             self.update_status(f'Ошибка: {str(e)}')
+            return
+        
+        if histogram_bytes:
+            self.create_histogram_window(histogram_bytes, f'Гистограмма {title}')
+            self.update_status('Гистограмма построена')
+        else:
+            self.update_status('Ошибка построения гистограммы')
     
     def show_histogram_comparison(self) -> None:
         """Показывает сравнение гистограмм"""
+        self.update_status('Построение гистограмм...')
+        self._histogram_generation += 1
+        self._submit_task(
+            '-HIST_COMPARE_READY-', self._histogram_generation,
+            self._render_histogram_comparison
+        )
+    
+    def _render_histogram_comparison(self) -> Optional[Tuple[bytes, bytes]]:
+        """Вычисляет и рисует пару гистограмм для сравнения (в фоновом потоке)"""
+        current_hist = self._image_service.get_histogram()
+        original_hist = self._image_service.get_original_histogram()
+        
+        if not current_hist or not original_hist:
+            return None
+        
+        current_bytes = self._image_service.plot_histogram(current_hist, '(Текущее)', 4, 3)
+        original_bytes = self._image_service.plot_histogram(original_hist, '(Оригинальное)', 4, 3)
+        
+        if not current_bytes or not original_bytes:
+            return None
+        return original_bytes, current_bytes
+    
+    def on_histogram_comparison_ready(self, result: Tuple[int, Future]) -> None:
+        """Открывает окно сравнения гистограмм, построенных в фоновом потоке"""
+        generation, future = result
+        if generation != self._histogram_generation:
+            return
+        
         try:
-            current_hist = self._image_service.get_histogram()
-            original_hist = self._image_service.get_original_histogram()
-            
-            if not current_hist or not original_hist:
-                self.update_status('Не удалось получить гистограммы для сравнения')
-                return
-            
-            current_bytes = self._image_service.plot_histogram(current_hist, '(Текущее)', 4, 3)
-            original_bytes = self._image_service.plot_histogram(original_hist, '(Оригинальное)', 4, 3)
-            
-            if current_bytes and original_bytes:
-                self.create_comparison_window(original_bytes, current_bytes)
-            else:
-                self.update_status('Ошибка построения гистограмм')
-                
+            histograms = future.result()
         except Exception as e:
             self.update_status(f'Ошибка: {str(e)}')
+            return
+        
+        if histograms:
+            self.create_comparison_window(*histograms)
+            self.update_status('Гистограммы построены')
+        else:
+            self.update_status('Ошибка построения гистограмм')
     
     def create_histogram_window(self, histogram_bytes: bytes, title: str) -> None:
-        """Создает окно с гистограммой"""
-        button_style = {
-            'button_color': ('#CDB89D', '#6A6F4C'),
-            'border_width': 3,
-            'mouseover_colors': ('#CDB89D', '#7A7F5C'),
-            'font': ('Arial', 10, 'bold')
-        }
-        
-        layout = [
-            [sg.Image(data=histogram_bytes, background_color='#422F28')],
-            [sg.Button('Закрыть', key='-CLOSE_HIST-', **button_style)]
-        ]
-        
-        if self._current_histogram_window:
-            self._current_histogram_window.close()
+        """Показывает окно с гистограммой (окно создается один раз и переиспользуется)"""
+        if self._histogram_window is None:
+            layout = [
+                [sg.Image(data=histogram_bytes, key='-HIST_IMG-', background_color='#422F28')],
+                [sg.Button('Закрыть', key='-CLOSE_HIST-', **_DIALOG_BUTTON_STYLE)]
+            ]
+            
+            self._histogram_window = sg.Window(
+                title,
+                layout,
+                finalize=True,
+                modal=False,
+                location=(200, 200),
+                background_color='#422F28',
+                enable_close_attempted_event=True
+            )
+        else:
+            self._histogram_window['-HIST_IMG-'].update(data=histogram_bytes)
+            self._histogram_window.set_title(title)
+            self._histogram_window.un_hide()
         
-        self._current_histogram_window = sg.Window(
-            title,
-            layout,
-            finalize=True,
-            modal=False,
-            location=(200, 200),
-            background_color='#422F28'
-        )
+        if self._comparison_window is not None:
+            self._comparison_window.hide()
     
     def create_comparison_window(self, original_bytes: bytes, current_bytes: bytes) -> None:
-        """Создает окно сравнения гистограмм с горизонтальным расположением"""
-        button_style = {
-            'button_color': ('#CDB89D', '#6A6F4C'),
-            'border_width': 3,
-            'mouseover_colors': ('#CDB89D', '#7A7F5C'),
-            'font': ('Arial', 10, 'bold')
-        }
+        """Показывает окно сравнения гистограмм с горизонтальным расположением"""
+        if self._comparison_window is None:
+            layout = [
+                [
+                    sg.Column([[sg.Text('Оригинальная гистограмма:', font=_HEADER_FONT, text_color='#CDB89D')],
+                            [sg.Image(data=original_bytes, key='-HIST_ORIG_IMG-', background_color='#422F28')]], vertical_alignment='top', background_color='#422F28'),
+                    sg.VerticalSeparator(),
+                    sg.Column([[sg.Text('Текущая гистограмма:', font=_HEADER_FONT, text_color='#CDB89D')],
+                            [sg.Image(data=current_bytes, key='-HIST_CURR_IMG-', background_color='#422F28')]], vertical_alignment='top', background_color='#422F28')
+                ],
+                [sg.Button('Закрыть', key='-CLOSE_COMP-', **_DIALOG_BUTTON_STYLE)]
+            ]
+            
+            self._comparison_window = sg.Window(
+                'Сравнение гистограмм',
+                layout,
+                finalize=True,
+                modal=False,
+                location=(200, 200),
+                resizable=True,
+                background_color='#422F28',
+                enable_close_attempted_event=True
+            )
+        else:
+            self._comparison_window['-HIST_ORIG_IMG-'].update(data=original_bytes)
+            self._comparison_window['-HIST_CURR_IMG-'].update(data=current_bytes)
+            self._comparison_window.un_hide()
         
-        layout = [
-            [
-                sg.Column([[sg.Text('Оригинальная гистограмма:', font=('Arial', 12, 'bold'), text_color='#CDB89D')],
-                        [sg.Image(data=original_bytes, background_color='#422F28')]], vertical_alignment='top', background_color='#422F28'),
-                sg.VerticalSeparator(),
-                sg.Column([[sg.Text('Текущая гистограмма:', font=('Arial', 12, 'bold'), text_color='#CDB89D')],
-                        [sg.Image(data=current_bytes, background_color='#422F28')]], vertical_alignment='top', background_color='#422F28')
-            ],
-            [sg.Button('Закрыть', key='-CLOSE_COMP-', **button_style)]
-        ]
-
-        if self._current_histogram_window:
-            self._current_histogram_window.close()
-
-        self._current_histogram_window = sg.Window(
-            'Сравнение гистограмм',
-            layout,
-            finalize=True,
-            modal=False,
-            location=(200, 200),
-            resizable=True,
-            background_color='#422F28'
-        )
+        if self._histogram_window is not None:
+            self._histogram_window.hide()
+    
+    def handle_histogram_window_event(self, window: sg.Window, event: str) -> None:
+        """Обрабатывает события окон гистограмм: закрытие только скрывает окно"""
+        if event in (sg.WINDOW_CLOSE_ATTEMPTED_EVENT, '-CLOSE_HIST-', '-CLOSE_COMP-'):
+            window.hide()
+        elif event == sg.WIN_CLOSED:
+            # Окно уничтожено системой - при следующем показе создадим новое
+            if window is self._histogram_window:
+                self._histogram_window = None
+            else:
+                self._comparison_window = None
     
     def run(self) -> None:
         """Запускает главный цикл приложения"""
@@ -544,104 +959,132 @@ class ImageProcessorGUI:
         
         try:
             while True:
-                window, event, values = sg.read_all_windows(timeout=100)
+                # Без отложенной работы цикл блокируется до события и не нагружает CPU
+                busy = self._pending_params_dirty or self._inflight_futures
+                timeout = _BUSY_POLL_MS if busy else None
+                if self._histogram_window is None and self._comparison_window is None:
+                    # Пока окон гистограмм нет, читаем только главное окно
+                    window = self._window
+                    event, values = window.read(timeout=timeout)
+                else:
+                    window, event, values = sg.read_all_windows(timeout=timeout)
                 
-                if event == sg.WIN_CLOSED or event == '-EXIT-':
-                    break
+                if event == sg.TIMEOUT_KEY:
+                    self.apply_pending_params()
+                    continue
                 
-                if window == self._window:
+                if window is self._window:
+                    if event == sg.WIN_CLOSED or event == '-EXIT-':
+                        break
                     self.handle_main_window_event(event, values)
-                elif window == self._current_histogram_window:
-                    if event in [sg.WIN_CLOSED, '-CLOSE_HIST-', '-CLOSE_COMP-']:
-                        window.close()
-                        self._current_histogram_window = None
+                elif window is not None and window in (self._histogram_window, self._comparison_window):
+                    self.handle_histogram_window_event(window, event)
         
         finally:
-            if self._current_histogram_window:
-                self._current_histogram_window.close()
+            # Незавершенные фоновые задачи больше не нужны
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            for histogram_window in (self._histogram_window, self._comparison_window):
+                if histogram_window is not None:
+                    histogram_window.close()
             if self._window:
                 self._window.close()
     
+    def _build_event_handlers(self) -> Dict[str, Callable[[Dict[str, Any]], None]]:
+        """Строит таблицу обработчиков событий главного окна"""
+        handlers: Dict[str, Callable[[Dict[str, Any]], None]] = {
+            '-LOAD-': lambda values: self.load_image(),
+            '-SAVE-': lambda values: self.save_image(),
+            '-RESET-': self.on_reset,
+            '-GRAYSCALE-': self.on_grayscale,
+            '-ROTATE-': self.on_rotate,
+            '-BRIGHTNESS_APPLY-': partial(self.on_apply_param, '-BRIGHTNESS-'),
+            '-CONTRAST_APPLY-': partial(self.on_apply_param, '-CONTRAST-'),
+            '-SATURATION_APPLY-': partial(self.on_apply_param, '-SATURATION-'),
+            '-LINEAR_CORRECT-': partial(
+                self.on_correction, '-LINEAR_FACTOR-', self._image_service.apply_linear_correction,
+                'Линейная коррекция применена', 'Ошибка линейной коррекции'
+            ),
+            '-LOG_CORRECT-': partial(
+                self.on_correction, '-LOG_FACTOR-', self._image_service.apply_logarithmic_correction,
+                'Логарифмическая коррекция применена', 'Ошибка логарифмической коррекции'
+            ),
+            '-GAMMA_CORRECT-': partial(
+                self.on_correction, '-GAMMA_FACTOR-', self._image_service.apply_gamma_correction,
+                'Гамма коррекция применена', 'Ошибка гамма коррекции'
+            ),
+            '-HIST_CURRENT-': lambda values: self.show_histogram('current'),
+            '-HIST_ORIGINAL-': lambda values: self.show_histogram('original'),
+            '-HIST_COMPARE-': lambda values: self.show_histogram('compare'),
+            '-COPY_PATH-': lambda values: self.copy_file_path(),
+            '-COPY_NAME-': lambda values: self.copy_file_name(),
+            '-FILE_PREVIEW_READY-': lambda values: self.on_file_preview_ready(values['-FILE_PREVIEW_READY-']),
+            '-LOAD_DONE-': lambda values: self.on_load_done(values['-LOAD_DONE-']),
+            '-SAVE_DONE-': lambda values: self.on_save_done(values['-SAVE_DONE-']),
+            '-PARAMS_APPLIED-': lambda values: self.on_params_applied(values['-PARAMS_APPLIED-']),
+            '-INFO_READY-': lambda values: self.on_info_ready(values['-INFO_READY-']),
+            '-PREVIEW_READY-': lambda values: self.on_preview_ready(values['-PREVIEW_READY-']),
+            '-HIST_READY-': lambda values: self.on_histogram_ready(values['-HIST_READY-']),
+            '-HIST_COMPARE_READY-': lambda values: self.on_histogram_comparison_ready(values['-HIST_COMPARE_READY-']),
+        }
+        # Все слайдеры параметров обрабатываются одним методом
+        for slider_key in _PARAM_SLIDERS:
+            handlers[slider_key] = partial(self.on_param_slider, slider_key)
+        return handlers
+    
     def handle_main_window_event(self, event: str, values: Dict[str, Any]) -> None:
         """Обрабатывает события главного окна"""
+        handler = self._handlers.get(event)
+        if handler is None:
+            return
+        
         try:
-            if event == '-LOAD-':
-                self.load_image()
-            
-            elif event == '-SAVE-':
-                self.save_image()
-            
-            elif event == '-RESET-':
-                if self._image_service.reset_to_original():
-                    self.update_image_display()
-                    self.reset_processing_params()
-                    self.update_status('Изображение сброшено к оригиналу')
-                    self.enable_image_controls(True)
-                else:
-                    self.update_status('Ошибка сброса изображения')
-            
-            elif event == '-GRAYSCALE-':
-                if self._image_service.convert_to_grayscale():
-                    self.update_image_display()
-                    self.update_status('Изображение преобразовано в градации серого')
-                    self.enable_image_controls(True)
-                else:
-                    self.update_status('Ошибка преобразования в градации серого')
-            
-            elif event == '-ROTATE-':
-                self._processing_params.rotation = (self._processing_params.rotation + 90) % 360
-                self.apply_processing_params()
-            
-            elif event == '-BRIGHTNESS_APPLY-':
-                self._processing_params.brightness = values['-BRIGHTNESS-']
-                self.apply_processing_params()
-            
-            elif event == '-CONTRAST_APPLY-':
-                self._processing_params.contrast = values['-CONTRAST-']
-                self.apply_processing_params()
-            
-            elif event == '-SATURATION_APPLY-':
-                self._processing_params.saturation = values['-SATURATION-']
-                self.apply_processing_params()
-            
-            elif event == '-LINEAR_CORRECT-':
-                factor = values['-LINEAR_FACTOR-']
-                if self._image_service.apply_linear_correction(factor):
-                    self.update_image_display()
-                    self.update_status('Линейная коррекция применена')
-                else:
-                    self.update_status('Ошибка линейной коррекции')
-            
-            elif event == '-LOG_CORRECT-':
-                factor = values['-LOG_FACTOR-']
-                if self._image_service.apply_logarithmic_correction(factor):
-                    self.update_image_display()
-                    self.update_status('Логарифмическая коррекция применена')
-                else:
-                    self.update_status('Ошибка логарифмической коррекции')
-            
-            elif event == '-GAMMA_CORRECT-':
-                gamma = values['-GAMMA_FACTOR-']
-                if self._image_service.apply_gamma_correction(gamma):
-                    self.update_image_display()
-                    self.update_status('Гамма коррекция применена')
-                else:
-                    self.update_status('Ошибка гамма коррекции')
-            
-            elif event == '-HIST_CURRENT-':
-                self.show_histogram('current')
-            
-            elif event == '-HIST_ORIGINAL-':
-                self.show_histogram('original')
-            
-            elif event == '-HIST_COMPARE-':
-                self.show_histogram('compare')
-            
-            elif event == '-COPY_PATH-':
-                self.copy_file_path()
-            
-            elif event == '-COPY_NAME-':
-                self.copy_file_name()
-                
+            handler(values)
         except Exception as e:
             self.update_status(f'Ошибка: {str(e)}')
+    
+    def on_reset(self, values: Dict[str, Any]) -> None:
+        """Сбрасывает изображение к оригиналу"""
+        if self._image_service.reset_to_original():
+            self.invalidate_preview_cache()
+            self.update_image_display()
+            self.reset_processing_params()
+            self.update_status('Изображение сброшено к оригиналу')
+            self.enable_image_controls(True)
+        else:
+            self.update_status('Ошибка сброса изображения')
+    
+    def on_grayscale(self, values: Dict[str, Any]) -> None:
+        """Преобразует изображение в градации серого"""
+        if self._image_service.convert_to_grayscale():
+            self.invalidate_preview_cache()
+            self.update_image_display()
+            self.update_status('Изображение преобразовано в градации серого')
+            self.enable_image_controls(True)
+        else:
+            self.update_status('Ошибка преобразования в градации серого')
+    
+    def on_rotate(self, values: Dict[str, Any]) -> None:
+        """Поворачивает изображение на 90 градусов"""
+        self._processing_params.rotation = (self._processing_params.rotation + 90) % 360
+        self.apply_processing_params()
+    
+    def on_apply_param(self, slider_key: str, values: Dict[str, Any]) -> None:
+        """Применяет значение слайдера параметра по кнопке"""
+        setattr(self._processing_params, _PARAM_SLIDERS[slider_key], values[slider_key])
+        self.apply_processing_params()
+    
+    def on_correction(
+        self,
+        slider_key: str,
+        correction: Callable[[float], bool],
+        success_message: str,
+        error_message: str,
+        values: Dict[str, Any]
+    ) -> None:
+        """Применяет коррекцию с коэффициентом из слайдера"""
+        if correction(values[slider_key]):
+            self.invalidate_preview_cache()
+            self.update_image_display()
+            self.update_status(success_message)
+        else:
+            self.update_status(error_message)
@@ -2,15 +2,41 @@
 Сервисы для работы с изображениями.
 Содержат бизнес-логику приложения.
 """
-from typing import Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import wraps
+import dataclasses
+import threading
+import weakref
+from typing import Callable, Dict, Optional, Tuple
 import numpy as np
 
 from domain.models import Image, ImageProcessingParameters, Histogram
 from domain.interfaces import (
     IImageRepository, IImageProcessor, IHistogramService, 
-    IImageDisplayService
+    IImageDisplayService, IHistogramPreviewService
 )
 
+# Отклонение параметра от нейтрального значения, которое считается нулевым
+_IDENTITY_EPS = 1e-6
+
+
+def _is_identity_tone(brightness: float, contrast: float, saturation: float) -> bool:
+    """Проверяет, что яркость, контрастность и насыщенность не меняют изображение"""
+    return (
+        abs(brightness) < _IDENTITY_EPS and
+        abs(contrast - 1.0) < _IDENTITY_EPS and
+        abs(saturation - 1.0) < _IDENTITY_EPS
+    )
+
+
+def _with_state_lock(method: Callable) -> Callable:
+    """Выполняет метод сервиса под блокировкой состояния изображения"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._state_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class ImageService:
     """Основной сервис для работы с изображениями"""
@@ -20,26 +46,58 @@ class ImageService:
         image_repository: IImageRepository,
         image_processor: IImageProcessor,
         histogram_service: IHistogramService,
-        display_service: IImageDisplayService
+        display_service: IImageDisplayService,
+        histogram_preview_service: Optional[IHistogramPreviewService] = None
     ):
         self._image_repository = image_repository
         self._image_processor = image_processor
         self._histogram_service = histogram_service
         self._display_service = display_service
+        self._histogram_preview_service = histogram_preview_service
         self._current_image: Optional[Image] = None
-        self._is_gray = False
+        # Изменения состояния выполняются по очереди: параметры могут применяться
+        # в фоновом потоке, пока GUI вызывает остальные операции
+        self._state_lock = threading.RLock()
+        # Фоновое применение параметров: одна задача за раз, устаревшие отменяются
+        self._apply_executor = ThreadPoolExecutor(max_workers=1)
+        self._pending_apply: Optional[Future] = None
+        # Растет при загрузке и сбросах: запрошенные до них применения не выполняются
+        self._apply_epoch = 0
+        # Счетчик изменений данных, которые не описываются параметрами обработки
+        self._version = 0
         
         # Текущие параметры обработки для расчета дельты
         self._current_processing_params = ImageProcessingParameters()
+        # Данные, полученные последним применением параметров, и сами параметры
+        self._applied_params: Optional[Tuple[weakref.ref, ImageProcessingParameters]] = None
         
-        # Базовое изображение (с фильтрациями, но без параметров яркости/контрастности/насыщенности)
+        # Базовое изображение (с фильтрациями, но без параметров яркости/контрастности/насыщенности).
+        # Хранится без копии: ядра обработки не изменяют входные массивы
         self._base_image_data: Optional[np.ndarray] = None
+        
+        # Изображение до коррекций и накопленная кривая коррекций (float32, 256 значений)
+        self._correction_source: Optional[np.ndarray] = None
+        self._correction_curve: Optional[np.ndarray] = None
+        
+        # Гистограммы оригинала и текущих данных (по слабой ссылке на массив)
+        # и построенные графики: повторные запросы не проходят по изображению
+        self._original_histogram: Optional[Tuple[weakref.ref, Histogram]] = None
+        self._current_histogram: Optional[Tuple[weakref.ref, Histogram]] = None
+        self._histogram_plots: Dict[Tuple[str, float, float], Tuple[Histogram, bytes]] = {}
+        # Последнее подготовленное для отображения изображение (по слабой ссылке на массив)
+        self._display_bytes: Optional[Tuple[weakref.ref, Tuple[int, int], bytes]] = None
 
     @property
     def current_image(self) -> Optional[Image]:
         """Получает текущее изображение"""
         return self._current_image
     
+    @property
+    def version(self) -> int:
+        """Версия данных: растет при загрузке, сбросе, преобразованиях и коррекциях"""
+        return self._version
+    
+    @_with_state_lock
     def load_image(self, file_path: str) -> bool:
         """Загружает изображение"""
         try:
@@ -49,8 +107,10 @@ class ImageService:
                 # Сбрасываем параметры обработки при загрузке нового изображения
                 self._current_processing_params = ImageProcessingParameters()
                 # Устанавливаем базовое изображение как оригинальное
-                self._base_image_data = image.original_data.copy()
-                self._is_gray = False
+                self._base_image_data = image.original_data
+                self._reset_correction_curve()
+                self._apply_epoch += 1
+                self._version += 1
                 return True
             return False
         except Exception:
@@ -66,6 +126,7 @@ class ImageService:
         except Exception:
             return False
     
+    @_with_state_lock
     def convert_to_grayscale(self) -> bool:
         """Преобразует текущее изображение в градации серого"""
         if not self._current_image:
@@ -76,40 +137,48 @@ class ImageService:
                 self._current_image.current_data
             )
             self._current_image.update_data(grayscale_data)
-            self._is_gray = True
+            # Базовое изображение тоже переводим в один канал: параметры и коррекции
+            # дальше обрабатывают втрое меньше данных и не требуют повторной конвертации.
+            # Это намеренное изменение поведения: яркость и контраст применяются к уже
+            # серому изображению, которое видит пользователь. При насыщении каналов
+            # результат отличается от прежнего порядка (чистый красный с яркостью +100
+            # раньше давал 76, теперь 152)
+            if self._base_image_data is not None:
+                self._base_image_data = self._image_processor.convert_to_grayscale(self._base_image_data)
+            # Накопленная кривая относится к цветному источнику: следующая коррекция
+            # начинается заново от серого базового изображения, которое видит пользователь
+            self._reset_correction_curve()
+            self._version += 1
             return True
         except Exception:
             return False
     
+    @_with_state_lock
     def apply_processing_parameters(self, params: ImageProcessingParameters) -> bool:
         """Применяет параметры обработки к изображению"""
         if not self._current_image or not params.validate():
             return False
         
+        # Те же параметры уже применены к текущим данным
+        applied = self._applied_params
+        if applied is not None and applied[0]() is self._current_image.current_data and applied[1] == params:
+            return True
+        
         if self._base_image_data is None:
-            # Если базовое изображение не установлено, используем текущее
-            self._base_image_data = self._current_image.current_data.copy()
+            # Если базовое изображение не установлено, используем текущее (оно только для чтения)
+            self._base_image_data = self._current_image.current_data
         
         try:
-            # Начинаем с базового изображения (с фильтрациями, но без параметров яркости/контрастности/насыщенности)
-            processed_data = self._base_image_data.copy()
-            
-            # Применяем яркость
-            if params.brightness != 0:
-                processed_data = self._image_processor.adjust_brightness(
-                    processed_data, params.brightness
-                )
-            
-            # Применяем контрастность
-            if params.contrast != 1.0:
-                processed_data = self._image_processor.adjust_contrast(
-                    processed_data, params.contrast
-                )
+            # Начинаем с базового изображения (с фильтрациями, но без параметров яркости/контрастности/насыщенности).
+            # Параметры применяются абсолютно, а ядра возвращают новые массивы, поэтому копия не нужна
+            processed_data = self._base_image_data
             
-            # Применяем насыщенность (только для цветных изображений)
-            if not self._current_image.is_grayscale() and params.saturation != 1.0:
-                processed_data = self._image_processor.adjust_saturation(
-                    processed_data, params.saturation
+            # Применяем яркость, контрастность и насыщенность (только для цветных
+            # изображений) одним проходом по пикселям
+            saturation = 1.0 if self._current_image.is_grayscale() else params.saturation
+            if not _is_identity_tone(params.brightness, params.contrast, saturation):
+                processed_data = self._image_processor.apply_tone(
+                    processed_data, params.brightness, params.contrast, saturation
                 )
             
             # Для поворота применяем дельту и обновляем базовое изображение
@@ -124,10 +193,10 @@ class ImageService:
                 self._base_image_data = self._image_processor.rotate_image(
                     self._base_image_data, rotation_delta
                 )
-            
-            # Если изображение было в градациях серого, принудительно конвертируем результат
-            if self._is_gray:
-                processed_data = self._image_processor.convert_to_grayscale(processed_data)
+                if self._correction_source is not None:
+                    self._correction_source = self._image_processor.rotate_image(
+                        self._correction_source, rotation_delta
+                    )
             
             # Обновляем текущие параметры обработки
             self._current_processing_params = ImageProcessingParameters(
@@ -138,103 +207,143 @@ class ImageService:
             )
             
             self._current_image.update_data(processed_data)
+            self._applied_params = (
+                weakref.ref(self._current_image.current_data), self._current_processing_params
+            )
             return True
         except Exception:
             return False
     
+    def apply_processing_parameters_async(self, params: ImageProcessingParameters) -> "Future[bool]":
+        """Применяет параметры обработки в фоновом потоке
+        
+        Еще не начатое применение предыдущих параметров отменяется: параметры
+        абсолютные, поэтому важен только последний запрос.
+        """
+        pending = self._pending_apply
+        if pending is not None:
+            pending.cancel()
+        
+        # Копия защищает от изменения параметров вызывающим кодом до запуска задачи
+        future = self._apply_executor.submit(
+            self._apply_in_epoch, dataclasses.replace(params), self._apply_epoch
+        )
+        self._pending_apply = future
+        return future
+    
+    @_with_state_lock
+    def _apply_in_epoch(self, params: ImageProcessingParameters, epoch: int) -> bool:
+        """Применяет параметры, если после запроса изображение не загружалось и не сбрасывалось"""
+        if epoch != self._apply_epoch:
+            return False
+        return self.apply_processing_parameters(params)
+    
+    @_with_state_lock
     def apply_linear_correction(self, factor: float) -> bool:
         """Применяет линейную коррекцию к изображению"""
         if not self._current_image:
             return False
         
         try:
-            # Применяем к базовому изображению (или текущему, если базовое не установлено)
-            base_data = self._base_image_data if self._base_image_data is not None else self._current_image.current_data
-            
-            corrected_data = self._image_processor.apply_linear_correction(
-                base_data, factor
-            )
+            corrected_data = self._apply_correction_curve('linear', factor)
             
             # Обновляем базовое изображение
-            self._base_image_data = corrected_data.copy()
+            self._base_image_data = corrected_data
             
             # Переприменяем параметры яркости/контрастности/насыщенности к новому базовому изображению
-            if self._current_processing_params.brightness != 0 or \
-               self._current_processing_params.contrast != 1.0 or \
-               self._current_processing_params.saturation != 1.0:
-                self.apply_processing_parameters(self._current_processing_params)
+            params = self._current_processing_params
+            if not _is_identity_tone(params.brightness, params.contrast, params.saturation):
+                self.apply_processing_parameters(params)
             else:
                 self._current_image.update_data(corrected_data)
             
+            self._version += 1
             return True
         except Exception:
             return False
     
+    @_with_state_lock
     def apply_logarithmic_correction(self, factor: float) -> bool:
         """Применяет логарифмическую коррекцию к изображению"""
         if not self._current_image:
             return False
         
         try:
-            # Применяем к базовому изображению (или текущему, если базовое не установлено)
-            base_data = self._base_image_data if self._base_image_data is not None else self._current_image.current_data
-            
-            corrected_data = self._image_processor.apply_logarithmic_correction(
-                base_data, factor
-            )
+            corrected_data = self._apply_correction_curve('log', factor)
             
             # Обновляем базовое изображение
-            self._base_image_data = corrected_data.copy()
+            self._base_image_data = corrected_data
             
             # Переприменяем параметры яркости/контрастности/насыщенности к новому базовому изображению
-            if self._current_processing_params.brightness != 0 or \
-               self._current_processing_params.contrast != 1.0 or \
-               self._current_processing_params.saturation != 1.0:
-                self.apply_processing_parameters(self._current_processing_params)
+            params = self._current_processing_params
+            if not _is_identity_tone(params.brightness, params.contrast, params.saturation):
+                self.apply_processing_parameters(params)
             else:
                 self._current_image.update_data(corrected_data)
             
+            self._version += 1
             return True
         except Exception:
             return False
     
+    @_with_state_lock
     def apply_gamma_correction(self, gamma: float) -> bool:
         """Применяет гамма коррекцию к изображению"""
         if not self._current_image:
             return False
         
         try:
-            # Применяем к базовому изображению (или текущему, если базовое не установлено)
-            base_data = self._base_image_data if self._base_image_data is not None else self._current_image.current_data
-            
-            corrected_data = self._image_processor.apply_gamma_correction(
-                base_data, gamma
-            )
+            corrected_data = self._apply_correction_curve('gamma', gamma)
             
             # Обновляем базовое изображение
-            self._base_image_data = corrected_data.copy()
+            self._base_image_data = corrected_data
             
             # Переприменяем параметры яркости/контрастности/насыщенности к новому базовому изображению
-            if self._current_processing_params.brightness != 0 or \
-               self._current_processing_params.contrast != 1.0 or \
-               self._current_processing_params.saturation != 1.0:
-                self.apply_processing_parameters(self._current_processing_params)
+            params = self._current_processing_params
+            if not _is_identity_tone(params.brightness, params.contrast, params.saturation):
+                self.apply_processing_parameters(params)
             else:
                 self._current_image.update_data(corrected_data)
             
+            self._version += 1
             return True
         except Exception:
             return False
     
+    def _apply_correction_curve(self, operation: str, param: float) -> np.ndarray:
+        """Добавляет коррекцию к накопленной кривой и применяет кривую к изображению
+        
+        Кривая хранится во float32 для 256 значений uint8, поэтому цепочка
+        коррекций не округляется до uint8 между шагами, а само изображение
+        обрабатывается одним проходом по таблице.
+        """
+        # Базовое изображение меняется - параметры нужно применить заново
+        self._applied_params = None
+        if self._correction_source is None:
+            # Применяем к базовому изображению (или текущему, если базовое не установлено)
+            self._correction_source = self._base_image_data if self._base_image_data is not None else self._current_image.current_data
+            self._correction_curve = np.arange(256, dtype=np.float32) / 255.0
+        
+        self._correction_curve = self._image_processor.compose_correction(
+            self._correction_curve, operation, param
+        )
+        lut = (self._correction_curve * 255).astype(np.uint8)
+        return self._image_processor.apply_lookup_table(self._correction_source, lut)
+    
     def get_histogram(self) -> Optional[Histogram]:
         """Получает гистограмму текущего изображения"""
         if not self._current_image:
             return None
         
         try:
-            return self._histogram_service.calculate_histogram(
-                self._current_image.current_data
+            current_data = self._current_image.current_data
+            if current_data is self._current_image.original_data:
+                return self.get_original_histogram()
+            
+            self._current_histogram, histogram = self._cached_histogram(
+                self._current_histogram, current_data
             )
+            return histogram
         except Exception:
             return None
     
@@ -244,16 +353,52 @@ class ImageService:
             return None
         
         try:
-            return self._histogram_service.calculate_histogram(
-                self._current_image.original_data
+            self._original_histogram, histogram = self._cached_histogram(
+                self._original_histogram, self._current_image.original_data
             )
+            return histogram
         except Exception:
             return None
     
+    def _cached_histogram(
+        self, cached: Optional[Tuple[weakref.ref, Histogram]], image_data: np.ndarray
+    ) -> Tuple[Tuple[weakref.ref, Histogram], Histogram]:
+        """Возвращает гистограмму из кеша, если массив не менялся, иначе вычисляет ее"""
+        # Массивы модели неизменяемы, поэтому тот же объект означает те же пиксели
+        if cached is not None and cached[0]() is image_data:
+            return cached, cached[1]
+        
+        histogram = self._histogram_service.calculate_histogram(image_data)
+        return (weakref.ref(image_data), histogram), histogram
+    
     def plot_histogram(self, histogram: Histogram, title: str = "", width: float = 10, height: float = 6) -> Optional[bytes]:
         """Строит график гистограммы"""
         try:
-            return self._histogram_service.plot_histogram(histogram, title, width, height)
+            key = (title, width, height)
+            cached = self._histogram_plots.get(key)
+            if cached is not None and cached[0] is histogram:
+                return cached[1]
+            
+            histogram_bytes = self._histogram_service.plot_histogram(histogram, title, width, height)
+            self._histogram_plots[key] = (histogram, histogram_bytes)
+            return histogram_bytes
+        except Exception:
+            return None
+    
+    @property
+    def has_histogram_preview(self) -> bool:
+        """Доступно ли быстрое превью гистограммы"""
+        return self._histogram_preview_service is not None
+    
+    def render_histogram_preview(self, width: float = 10, height: float = 6) -> Optional[bytes]:
+        """Строит быстрое превью гистограммы текущего изображения"""
+        if not self._current_image or not self._histogram_preview_service:
+            return None
+        
+        try:
+            return self._histogram_preview_service.render_histogram_preview(
+                self._current_image.current_data, width, height
+            )
         except Exception:
             return None
     
@@ -263,12 +408,58 @@ class ImageService:
             return None
         
         try:
-            return self._display_service.prepare_for_display(
-                self._current_image.current_data, max_size
-            )
+            return self._encode_for_display(self._current_image.current_data, max_size)
+        except Exception:
+            return None
+    
+    def prepare_image_snapshot_for_display(
+        self, max_size: Tuple[int, int] = (800, 600)
+    ) -> Optional[Tuple[int, ImageProcessingParameters, bytes]]:
+        """Подготавливает текущее изображение для отображения вместе с версией и параметрами
+        
+        Версия, параметры и данные читаются под одной блокировкой, поэтому
+        возвращенные байты всегда соответствуют возвращенным версии и параметрам,
+        даже если фоновое применение параметров завершилось во время кодирования.
+        """
+        with self._state_lock:
+            if not self._current_image:
+                return None
+            version = self._version
+            params = self._current_processing_params
+            current_data = self._current_image.current_data
+        
+        try:
+            display_bytes = self._encode_for_display(current_data, max_size)
         except Exception:
             return None
+        return version, params, display_bytes
     
+    def _encode_for_display(self, data: np.ndarray, max_size: Tuple[int, int]) -> bytes:
+        """Кодирует данные для отображения (повторный запрос для тех же данных и размера берется из кеша)"""
+        cached = self._display_bytes
+        if cached is not None and cached[0]() is data and cached[1] == max_size:
+            return cached[2]
+        
+        display_bytes = self._display_service.prepare_for_display(data, max_size)
+        self._display_bytes = (weakref.ref(data), max_size, display_bytes)
+        return display_bytes
+    
+    def prepare_file_preview(self, file_path: str, max_size: Tuple[int, int] = (800, 600)) -> Optional[bytes]:
+        """Подготавливает быстрое превью файла до его полной загрузки"""
+        try:
+            preview_data = self._image_repository.load_image_for_preview(file_path, max_size)
+            if preview_data is None:
+                return None
+            return self._display_service.prepare_for_display(preview_data, max_size)
+        except Exception:
+            return None
+    
+    def close(self) -> None:
+        """Освобождает ресурсы сервисов"""
+        self._apply_executor.shutdown(wait=False, cancel_futures=True)
+        self._histogram_service.close()
+    
+    @_with_state_lock
     def reset_to_original(self) -> bool:
         """Сбрасывает изображение к оригиналу"""
         if not self._current_image:
@@ -276,19 +467,27 @@ class ImageService:
         
         try:
             self._current_image.reset_to_original()
-            self._is_gray = False
             # Сбрасываем параметры обработки
             self._current_processing_params = ImageProcessingParameters()
             # Сбрасываем базовое изображение
-            self._base_image_data = self._current_image.original_data.copy()
+            self._base_image_data = self._current_image.original_data
+            self._reset_correction_curve()
+            self._apply_epoch += 1
+            self._version += 1
             return True
         except Exception:
             return False
     
+    def _reset_correction_curve(self) -> None:
+        """Сбрасывает накопленные коррекции"""
+        self._correction_source = None
+        self._correction_curve = None
+    
     def get_current_processing_params(self) -> ImageProcessingParameters:
         """Получает текущие параметры обработки"""
         return self._current_processing_params
     
+    @_with_state_lock
     def reset_processing_params(self) -> bool:
         """Сбрасывает параметры обработки к значениям по умолчанию"""
         if not self._current_image:
@@ -297,6 +496,7 @@ class ImageService:
         try:
             # Сбрасываем параметры обработки
             self._current_processing_params = ImageProcessingParameters()
+            self._apply_epoch += 1
             return True
         except Exception:
             return False
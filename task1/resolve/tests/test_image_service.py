@@ -0,0 +1,53 @@
+"""
+Тесты сервиса обработки изображений.
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image as PILImage
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.image_service import ImageService
+from adapters.image_repository import PillowImageRepository, ExifReader
+from adapters.image_processor import PillowImageProcessor
+from adapters.histogram_service import MatplotlibHistogramService, PillowDisplayService
+
+
+class ImageServiceCorrectionTest(unittest.TestCase):
+    """Коррекции после преобразования в градации серого"""
+    
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._file_path = os.path.join(self._tmp_dir.name, 'red.png')
+        pixels = np.zeros((4, 4, 3), dtype=np.uint8)
+        pixels[..., 0] = 200
+        PILImage.fromarray(pixels).save(self._file_path)
+        
+        self._service = ImageService(
+            PillowImageRepository(ExifReader()),
+            PillowImageProcessor(),
+            MatplotlibHistogramService(),
+            PillowDisplayService()
+        )
+        self.assertTrue(self._service.load_image(self._file_path))
+    
+    def tearDown(self):
+        self._service.close()
+        self._tmp_dir.cleanup()
+    
+    def test_correction_after_grayscale_continues_from_gray_image(self):
+        self.assertTrue(self._service.apply_linear_correction(2.0))
+        self.assertTrue(self._service.convert_to_grayscale())
+        gray = self._service.current_image.current_data.copy()
+        
+        # Тождественная коррекция не должна менять то, что видит пользователь
+        self.assertTrue(self._service.apply_linear_correction(1.0))
+        np.testing.assert_array_equal(self._service.current_image.current_data, gray)
+
+
+if __name__ == '__main__':
+    unittest.main()